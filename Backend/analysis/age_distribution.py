@@ -1,56 +1,49 @@
-import numpy as np
-from .data_loader import load_dataset
+from .aggregates import get_aggregates, count_between, boxplot_summary, age_mean, age_quantile, age_min, age_max
 
-def get_age_distribution():
-    """获取年龄分布统计数据"""
-    df = load_dataset()
+def get_age_distribution(cohort=None, aggregates=None):
+    """获取年龄分布统计数据，cohort 为可选的患者筛选条件，aggregates 为调用方已取得的聚合结果"""
+    if aggregates is None:
+        aggregates = get_aggregates(cohort)
     
-    if df is None:
+    if aggregates is None:
         return {"error": "无法加载数据"}
     
     # 年龄分布总体统计
     age_bins = list(range(20, 90, 5))
     age_labels = [f"{start}-{start+4}" for start in age_bins]
     
-    # 计算年龄分布直方图
-    hist, bin_edges = np.histogram(df['AGE'], bins=age_bins)
+    all_ages = aggregates.age_counts()
+    cancer_ages = aggregates.age_counts(cancer=1)
+    non_cancer_ages = aggregates.age_counts(cancer=0)
+    
+    # 计算年龄分布直方图（与 np.histogram 一致，最后一个区间为闭区间）
+    last = len(age_bins) - 2
+    hist = [
+        count_between(all_ages, start, end, inclusive=(i == last))
+        for i, (start, end) in enumerate(zip(age_bins[:-1], age_bins[1:]))
+    ]
     
     # 按照肺癌/非肺癌分组的年龄分布
     cancer_age_data = []
     non_cancer_age_data = []
     
-    for i, (start, end) in enumerate(zip(age_bins[:-1], age_bins[1:])):
-        cancer_count = df[(df['AGE'] >= start) & (df['AGE'] < end) & (df['LUNG_CANCER'] == 'YES')].shape[0]
-        non_cancer_count = df[(df['AGE'] >= start) & (df['AGE'] < end) & (df['LUNG_CANCER'] == 'NO')].shape[0]
-        
-        cancer_age_data.append(cancer_count)
-        non_cancer_age_data.append(non_cancer_count)
+    for start, end in zip(age_bins[:-1], age_bins[1:]):
+        cancer_age_data.append(count_between(cancer_ages, start, end))
+        non_cancer_age_data.append(count_between(non_cancer_ages, start, end))
     
-    # 箱型图数据
-    cancer_df = df[df['LUNG_CANCER'] == 'YES']
-    non_cancer_df = df[df['LUNG_CANCER'] == 'NO']
+    # 筛选后可能没有患者，此时中位数为 None
+    median = age_quantile(all_ages, 0.5)
     
+    # 箱型图数据
     boxplot_data = {
-        "肺癌": {
-            "min": int(cancer_df['AGE'].min()),
-            "max": int(cancer_df['AGE'].max()),
-            "median": int(cancer_df['AGE'].median()),
-            "q1": int(cancer_df['AGE'].quantile(0.25)),
-            "q3": int(cancer_df['AGE'].quantile(0.75))
-        },
-        "非肺癌": {
-            "min": int(non_cancer_df['AGE'].min()),
-            "max": int(non_cancer_df['AGE'].max()),
-            "median": int(non_cancer_df['AGE'].median()),
-            "q1": int(non_cancer_df['AGE'].quantile(0.25)),
-            "q3": int(non_cancer_df['AGE'].quantile(0.75))
-        }
+        "肺癌": boxplot_summary(cancer_ages),
+        "非肺癌": boxplot_summary(non_cancer_ages)
     }
     
     return {
         "histogramData": {
             "labels": age_labels,
-            "data": hist.tolist()
+            "data": hist
         },
         "groupedData": {
             "labels": age_labels,
@@ -59,9 +52,9 @@ def get_age_distribution():
         },
         "boxplotData": boxplot_data,
         "ageStatistics": {
-            "mean": float(df['AGE'].mean()),
-            "median": float(df['AGE'].median()),
-            "min": int(df['AGE'].min()),
-            "max": int(df['AGE'].max()),
+            "mean": age_mean(all_ages),
+            "median": float(median) if median is not None else None,
+            "min": age_min(all_ages),
+            "max": age_max(all_ages),
         }
-    } 
\ No newline at end of file
+    }
@@ -1,42 +1,28 @@
-import pandas as pd
-from .data_loader import load_dataset
+from .aggregates import get_aggregates, count_between
 
-def get_age_group_stats():
-    """获取不同年龄组的肺癌与非肺癌患者统计"""
-    df = load_dataset()
+def get_age_group_stats(cohort=None, aggregates=None):
+    """获取不同年龄组的肺癌与非肺癌患者统计，cohort 为可选的患者筛选条件，aggregates 为调用方已取得的聚合结果"""
+    if aggregates is None:
+        aggregates = get_aggregates(cohort)
     
-    if df is None:
+    if aggregates is None:
         return {"error": "无法加载数据"}
     
     # 定义年龄组区间
     age_bins = [20, 30, 40, 50, 60, 70, 80, 90]
     age_labels = ['20-29岁', '30-39岁', '40-49岁', '50-59岁', '60-69岁', '70-79岁', '80+岁']
     
-    # 添加年龄组分类
-    df['age_group'] = pd.cut(df['AGE'], bins=age_bins, labels=age_labels, right=False)
+    cancer_ages = aggregates.age_counts(cancer=1)
+    non_cancer_ages = aggregates.age_counts(cancer=0)
     
-    # 按年龄组和肺癌状态统计
-    grouped = df.groupby(['age_group', 'LUNG_CANCER_LABEL']).size().unstack(fill_value=0)
-    
-    # 确保所有列都存在
-    if '肺癌' not in grouped.columns:
-        grouped['肺癌'] = 0
-    if '非肺癌' not in grouped.columns:
-        grouped['非肺癌'] = 0
-    
-    # 计算每个年龄组的总人数和肺癌比例
-    grouped['总数'] = grouped['肺癌'] + grouped['非肺癌']
-    grouped['肺癌比例'] = grouped['肺癌'] / grouped['总数']
-    
-    # 重新索引以确保所有年龄组都有数据
-    all_groups = pd.DataFrame(index=age_labels)
-    grouped = grouped.reindex(all_groups.index).fillna(0)
-    
-    # 构造ECharts格式的数据
+    # 构造ECharts格式的数据（左闭右开区间）
     categories = age_labels
-    cancer_data = grouped['肺癌'].astype(int).tolist()
-    non_cancer_data = grouped['非肺癌'].astype(int).tolist()
-    ratio_data = [round(ratio * 100, 1) for ratio in grouped['肺癌比例'].tolist()]
+    cancer_data = [count_between(cancer_ages, start, end) for start, end in zip(age_bins[:-1], age_bins[1:])]
+    non_cancer_data = [count_between(non_cancer_ages, start, end) for start, end in zip(age_bins[:-1], age_bins[1:])]
+    ratio_data = [
+        round(cancer / (cancer + non_cancer) * 100, 1) if cancer + non_cancer > 0 else 0.0
+        for cancer, non_cancer in zip(cancer_data, non_cancer_data)
+    ]
     
     # 数据汇总
     age_summary = []
@@ -63,4 +49,4 @@ def get_age_group_stats():
             "ratios": ratio_data
         },
         "summary": age_summary
-    } 
\ No newline at end of file
+    }
@@ -0,0 +1,285 @@
+import threading
+
+import numpy as np
+
+from .data_loader import get_dataset_snapshot, get_dataset_version, is_large_dataset, iter_dataset_chunks
+
+# 年龄取值范围 [0, AGE_DOMAIN)，按单岁建立计数维度
+AGE_DOMAIN = 121
+
+# 肺癌危险因素（取值 1=否，2=是）
+RISK_FACTORS = [
+    'SMOKING', 'YELLOW_FINGERS', 'ANXIETY', 'PEER_PRESSURE',
+    'CHRONIC DISEASE', 'FATIGUE', 'ALLERGY', 'WHEEZING',
+    'ALCOHOL CONSUMING', 'COUGHING', 'SHORTNESS OF BREATH',
+    'SWALLOWING DIFFICULTY', 'CHEST PAIN'
+]
+
+# 参与相关性计算的数值列（顺序即相关性矩阵的顺序）
+MOMENT_COLUMNS = ['AGE', 'GENDER_NUMERIC'] + RISK_FACTORS + ['LUNG_CANCER_NUMERIC']
+
+
+def encode_frame(df):
+    """
+    将数据集编码为紧凑数组：
+    keys 为 (年龄, 性别, 肺癌) 的扁平索引，values 为 MOMENT_COLUMNS 对应的数值矩阵。
+    无法识别性别/肺癌标签或年龄越界的行被剔除。
+    """
+    age = df['AGE'].to_numpy(dtype=float)
+    gender = df['GENDER_NUMERIC'].to_numpy(dtype=float)
+    cancer = df['LUNG_CANCER_NUMERIC'].to_numpy(dtype=float)
+    factors = df[RISK_FACTORS].to_numpy(dtype=float)
+
+    valid = ~np.isnan(gender) & ~np.isnan(cancer) & (age >= 0) & (age < AGE_DOMAIN)
+    if not valid.all():
+        age, gender, cancer, factors = age[valid], gender[valid], cancer[valid], factors[valid]
+
+    # 年龄按整岁计数（非整数年龄向下取整）
+    keys = (np.floor(age).astype(np.int64) * 2 + gender.astype(np.int64)) * 2 + cancer.astype(np.int64)
+    values = np.column_stack([age, gender, factors, cancer])
+    return keys, values
+
+
+class DatasetAggregates:
+    """
+    肺癌数据集的联合计数立方体及协矩。
+
+    counts:        形状 (年龄, 性别, 肺癌) 的人数，性别 0=女 1=男，肺癌 0=否 1=是
+    factor_counts: 形状 (年龄, 性别, 肺癌, 危险因素) 的人数，仅统计存在该因素（取值 2）的患者
+    n / mean / comoment: MOMENT_COLUMNS 的样本数、均值与中心化协矩矩阵
+    """
+
+    def __init__(self, counts, factor_counts, n, mean, comoment):
+        self.counts = counts
+        self.factor_counts = factor_counts
+        self.n = n
+        self.mean = mean
+        self.comoment = comoment
+
+    @classmethod
+    def empty(cls):
+        n_factors = len(RISK_FACTORS)
+        n_columns = len(MOMENT_COLUMNS)
+        return cls(
+            np.zeros((AGE_DOMAIN, 2, 2), dtype=np.int64),
+            np.zeros((AGE_DOMAIN, 2, 2, n_factors), dtype=np.int64),
+            0,
+            np.zeros(n_columns),
+            np.zeros((n_columns, n_columns))
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """逐块聚合后合并，内存占用只与块大小有关"""
+        aggregates = cls.empty()
+        for chunk in chunks:
+            aggregates = aggregates.merge(cls.from_frame(chunk))
+        return aggregates
+
+    @classmethod
+    def from_frame(cls, df):
+        """对数据集做一次向量化分组，得到全部计数与协矩"""
+        return cls.from_arrays(*encode_frame(df))
+
+    @classmethod
+    def from_arrays(cls, keys, values, weights=None, age_m2=0.0):
+        """
+        由 encode_frame 得到的紧凑数组（或其中任意行子集）建立聚合结果。
+        weights 为每行代表的人数（分桶后的部分聚合），age_m2 为各行内部年龄的中心化二阶矩之和；
+        此时结果等于把各桶逐一 merge 的结果。
+        """
+        n_factors = len(RISK_FACTORS)
+        counts = np.bincount(keys, weights=weights, minlength=AGE_DOMAIN * 4)
+        counts = counts.astype(np.int64).reshape(AGE_DOMAIN, 2, 2)
+
+        # 所有 (行, 因素) 命中位置一次性分组
+        rows, cols = np.nonzero(values[:, 2:2 + n_factors] == 2)
+        factor_counts = np.bincount(
+            keys[rows] * n_factors + cols, weights=None if weights is None else weights[rows],
+            minlength=AGE_DOMAIN * 4 * n_factors
+        ).astype(np.int64).reshape(AGE_DOMAIN, 2, 2, n_factors)
+
+        # 中心化协矩，避免大样本下的数值抵消
+        n = values.shape[0] if weights is None else int(weights.sum())
+        if n:
+            values = values.astype(np.float64, copy=False)
+            if weights is None:
+                mean = values.mean(axis=0)
+                centered = values - mean
+                comoment = centered.T @ centered
+            else:
+                mean = weights @ values / n
+                centered = values - mean
+                comoment = (centered * weights[:, None]).T @ centered
+                comoment[0, 0] += age_m2
+        else:
+            mean = np.zeros(len(MOMENT_COLUMNS))
+            comoment = np.zeros((len(MOMENT_COLUMNS), len(MOMENT_COLUMNS)))
+
+        return cls(counts, factor_counts, n, mean, comoment)
+
+    def merge(self, other):
+        """合并两份聚合结果（计数直接相加，协矩按 Chan 并行公式合并）"""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (other.n / n)
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        return DatasetAggregates(
+            self.counts + other.counts,
+            self.factor_counts + other.factor_counts,
+            n,
+            mean,
+            comoment
+        )
+
+    def factor_index(self, factor):
+        return RISK_FACTORS.index(factor)
+
+    def age_counts(self, gender=None, cancer=None, factor=None, has_factor=True):
+        """按条件汇总出每个年龄的人数，返回长度为 AGE_DOMAIN 的数组，可直接作为分位数摘要使用"""
+        if factor is None:
+            cube = self.counts
+        else:
+            cube = self.factor_counts[..., self.factor_index(factor)]
+            if not has_factor:
+                cube = self.counts - cube
+        if gender is not None:
+            cube = cube[:, gender:gender + 1]
+        if cancer is not None:
+            cube = cube[:, :, cancer:cancer + 1]
+        return cube.sum(axis=(1, 2))
+
+    def correlation(self):
+        """由协矩计算 Pearson 相关系数矩阵"""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoment / np.outer(std, std)
+
+
+def count_between(age_counts, start, end, inclusive=False):
+    """统计 [start, end) 区间（inclusive=True 时为闭区间）内的人数"""
+    stop = end + 1 if inclusive else end
+    return int(age_counts[max(start, 0):max(min(stop, AGE_DOMAIN), 0)].sum())
+
+
+def age_quantiles(age_counts, qs):
+    """
+    由年龄计数一次计算多个分位数（与 pandas 默认的线性插值一致）。
+
+    按年龄的计数向量本身就是一个可合并、可增量更新的分位数摘要：
+    合并即逐项相加，追加数据即对应年龄加一，空间固定为 AGE_DOMAIN，与样本量无关。
+    年龄为整数时结果精确；非整数年龄在建立立方体时按整岁向下取整，误差小于 1 岁。
+    """
+    total = int(age_counts.sum())
+    if total == 0:
+        return [None] * len(qs)
+    cumulative = np.cumsum(age_counts)
+    positions = np.asarray(qs, dtype=float) * (total - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, total - 1)
+    lower_ages = np.searchsorted(cumulative, lower, side='right')
+    upper_ages = np.searchsorted(cumulative, upper, side='right')
+    return (lower_ages + (positions - lower) * (upper_ages - lower_ages)).tolist()
+
+
+def age_quantile(age_counts, q):
+    return age_quantiles(age_counts, [q])[0]
+
+
+def age_mean(age_counts):
+    total = age_counts.sum()
+    if total == 0:
+        return None
+    return float((np.arange(AGE_DOMAIN) * age_counts).sum() / total)
+
+
+def age_min(age_counts):
+    nonzero = np.flatnonzero(age_counts)
+    return int(nonzero[0]) if nonzero.size else None
+
+
+def age_max(age_counts):
+    nonzero = np.flatnonzero(age_counts)
+    return int(nonzero[-1]) if nonzero.size else None
+
+
+def boxplot_summary(age_counts):
+    """箱型图所需的五数概括"""
+    if age_counts.sum() == 0:
+        return {"min": None, "max": None, "median": None, "q1": None, "q3": None}
+    minimum, q1, median, q3, maximum = age_quantiles(age_counts, [0, 0.25, 0.5, 0.75, 1])
+    return {
+        "min": int(minimum),
+        "max": int(maximum),
+        "median": int(median),
+        "q1": int(q1),
+        "q3": int(q3)
+    }
+
+
+# 按数据集版本缓存的聚合结果
+_aggregates = {}
+_aggregates_lock = threading.Lock()
+
+
+def _build_aggregates():
+    """小文件整体载入后聚合；超过阈值的大文件分块流式聚合，不保留整张表"""
+    if is_large_dataset():
+        return DatasetAggregates.from_chunks(iter_dataset_chunks())
+    return DatasetAggregates.from_frame(get_dataset_snapshot().df)
+
+
+def get_aggregates(cohort=None):
+    """
+    获取当前数据集版本的聚合结果，加载失败时返回 None。
+    传入筛选条件 cohort 时，通过位图索引只聚合符合条件的患者。
+    """
+    if cohort:
+        from .cohort import ALL_PATIENTS, get_cohort_index
+        if cohort != ALL_PATIENTS:
+            index = get_cohort_index()
+            return index.aggregate(cohort) if index is not None else None
+
+    version = get_dataset_version()
+    if version is None:
+        return None
+
+    aggregates = _aggregates.get(version)
+    if aggregates is None:
+        with _aggregates_lock:
+            aggregates = _aggregates.get(version)
+            if aggregates is None:
+                try:
+                    aggregates = _build_aggregates()
+                except Exception as e:
+                    print(f"加载数据时出错: {e}")
+                    return None
+                # 数据集变化后旧版本的结果不再需要
+                _aggregates.clear()
+                _aggregates[version] = aggregates
+    return aggregates
+
+
+
+def append_to_aggregates(batch, write_batch):
+    """
+    将新追加的一批数据并入当前聚合结果，代价只与批量大小有关。
+    write_batch() 负责写入数据文件并返回 (旧版本号, 新版本号)；
+    写入与合并在同一把锁内完成，避免与并发的全量重建交错，筛选用的位图索引同时增量更新。
+    """
+    from .cohort import append_to_cohort_index
+
+    batch_aggregates = DatasetAggregates.from_frame(batch)
+    with _aggregates_lock:
+        # 位图索引同步并入新批次，写入本身在索引锁内完成
+        old_version, new_version = append_to_cohort_index(batch, write_batch)
+        current = _aggregates.get(old_version)
+        _aggregates.clear()
+        if current is not None:
+            _aggregates[new_version] = current.merge(batch_aggregates)
+    return new_version
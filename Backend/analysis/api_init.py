@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, jsonify, current_app, request
 import logging
 
 def create_analysis_bp():
@@ -12,13 +12,25 @@ def create_analysis_bp():
     from .age_group_stats import get_age_group_stats
     from .smoking_stats import get_smoking_stats
     from .patient_counts import get_patient_counts
+    from .dashboard import get_dashboard, parse_sections
+    from .records import append_records
+    from .cohort import parse_cohort, cohort_key
+    from .response_cache import versioned_json_response
+    
+    def cohort_response(name, compute):
+        """解析请求中的患者筛选条件，返回按数据集版本和筛选条件缓存的结果"""
+        try:
+            cohort = parse_cohort(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        key = cohort_key(cohort)
+        return versioned_json_response(f"{name}?{key}" if key else name, lambda: compute(cohort))
     
     @analysis_bp.route('/age-distribution', methods=['GET'])
     def age_distribution_api():
         """年龄分布图表API"""
         try:
-            result = get_age_distribution()
-            return jsonify(result)
+            return cohort_response('age-distribution', get_age_distribution)
         except Exception as e:
             logging.error(f"Error in age_distribution_api: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -27,8 +39,7 @@ def create_analysis_bp():
     def gender_cancer_api():
         """性别与肺癌关系图表API"""
         try:
-            result = get_gender_cancer_stats()
-            return jsonify(result)
+            return cohort_response('gender-cancer', get_gender_cancer_stats)
         except Exception as e:
             logging.error(f"Error in gender_cancer_api: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -37,8 +48,7 @@ def create_analysis_bp():
     def correlation_matrix_api():
         """相关性矩阵图表API"""
         try:
-            result = get_correlation_matrix()
-            return jsonify(result)
+            return cohort_response('correlation-matrix', get_correlation_matrix)
         except Exception as e:
             logging.error(f"Error in correlation_matrix_api: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -47,8 +57,7 @@ def create_analysis_bp():
     def age_group_stats_api():
         """年龄组统计图表API"""
         try:
-            result = get_age_group_stats()
-            return jsonify(result)
+            return cohort_response('age-group-stats', get_age_group_stats)
         except Exception as e:
             logging.error(f"Error in age_group_stats_api: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -57,8 +66,7 @@ def create_analysis_bp():
     def smoking_stats_api():
         """吸烟与年龄图表API"""
         try:
-            result = get_smoking_stats()
-            return jsonify(result)
+            return cohort_response('smoking-stats', get_smoking_stats)
         except Exception as e:
             logging.error(f"Error in smoking_stats_api: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -67,10 +75,39 @@ def create_analysis_bp():
     def patient_counts_api():
         """患者数量统计图表API"""
         try:
-            result = get_patient_counts()
-            return jsonify(result)
+            return cohort_response('patient-counts', get_patient_counts)
         except Exception as e:
             logging.error(f"Error in patient_counts_api: {str(e)}")
             return jsonify({"error": str(e)}), 500
     
+    @analysis_bp.route('/dashboard', methods=['GET'])
+    def dashboard_api():
+        """一次返回多个分析图表数据的API，可用 sections=a,b 选择模块，筛选参数同单独接口"""
+        try:
+            sections = parse_sections(request.args.get('sections'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            return cohort_response(
+                'dashboard:' + ','.join(sections),
+                lambda cohort: get_dashboard(sections, cohort)
+            )
+        except Exception as e:
+            logging.error(f"Error in dashboard_api: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+    
+    @analysis_bp.route('/records', methods=['POST'])
+    def append_records_api():
+        """追加患者记录API，接受单条记录字典或记录列表"""
+        data = request.get_json(silent=True)
+        if data is None:
+            return jsonify({"error": "请求体不能为空"}), 400
+        try:
+            return jsonify(append_records(data))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logging.error(f"Error in append_records_api: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+    
     return analysis_bp 
\ No newline at end of file
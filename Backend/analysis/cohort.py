@@ -0,0 +1,233 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .aggregates import AGE_DOMAIN, RISK_FACTORS, DatasetAggregates, encode_frame
+from .data_loader import get_dataset_snapshot, get_dataset_version, is_large_dataset, iter_dataset_chunks
+
+# 可筛选的症状/危险因素：前端字段 -> 表头字段（与预测接口的字段名一致），取值 1=否 2=是
+FLAG_FILTERS = {
+    "smoking": "SMOKING",
+    "yellow_fingers": "YELLOW_FINGERS",
+    "anxiety": "ANXIETY",
+    "peer_pressure": "PEER_PRESSURE",
+    "chronic_disease": "CHRONIC DISEASE",
+    "fatigue": "FATIGUE",
+    "allergy": "ALLERGY",
+    "wheezing": "WHEEZING",
+    "alcohol_consuming": "ALCOHOL CONSUMING",
+    "coughing": "COUGHING",
+    "shortness_of_breath": "SHORTNESS OF BREATH",
+    "swallowing_difficulty": "SWALLOWING DIFFICULTY",
+    "chest_pain": "CHEST PAIN"
+}
+
+# 筛选条件：gender 为 'M'/'F'，age_min/age_max 为闭区间，flags 为 ((表头字段, 取值), ...)
+Cohort = namedtuple('Cohort', ['gender', 'age_min', 'age_max', 'flags'])
+
+ALL_PATIENTS = Cohort(None, None, None, ())
+
+
+def _parse_int(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 应为整数")
+
+
+def parse_cohort(args):
+    """从请求参数解析筛选条件，例如 ?gender=M&age_min=40&smoking=2&coughing=2"""
+    gender = args.get('gender')
+    if gender:
+        gender = gender.strip().upper()
+        if gender not in ('M', 'F'):
+            raise ValueError("参数 gender 取值应为 M 或 F")
+    else:
+        gender = None
+
+    age_min = _parse_int(args, 'age_min')
+    age_max = _parse_int(args, 'age_max')
+    if age_min is not None and age_max is not None and age_min > age_max:
+        raise ValueError("参数 age_min 不能大于 age_max")
+
+    flags = []
+    for field, column in FLAG_FILTERS.items():
+        value = _parse_int(args, field)
+        if value is None:
+            continue
+        if value not in (1, 2):
+            raise ValueError(f"参数 {field} 取值应为 1 或 2")
+        flags.append((column, value))
+
+    return Cohort(gender, age_min, age_max, tuple(flags))
+
+
+def cohort_key(cohort):
+    """筛选条件的规范化字符串，用作缓存键"""
+    if cohort is None or cohort == ALL_PATIENTS:
+        return ''
+    parts = []
+    if cohort.gender:
+        parts.append(f"gender={cohort.gender}")
+    if cohort.age_min is not None:
+        parts.append(f"age_min={cohort.age_min}")
+    if cohort.age_max is not None:
+        parts.append(f"age_max={cohort.age_max}")
+    parts.extend(f"{column}={value}" for column, value in cohort.flags)
+    return '&'.join(parts)
+
+
+# 危险因素在分桶键中的位宽：第 k 位为 1 表示 RISK_FACTORS[k] 取值为 2
+FLAG_BITS = len(RISK_FACTORS)
+
+# 分桶的部分聚合：ids 为 (encode_frame 的键 << FLAG_BITS | 危险因素位) 且升序唯一，
+# counts 为桶内人数，age_mean / age_m2 为桶内年龄的均值与中心化二阶矩（年龄非整数时才非零）
+Buckets = namedtuple('Buckets', ['ids', 'counts', 'age_mean', 'age_m2'])
+
+
+def _group_buckets(ids, counts, age_mean, age_m2):
+    """按桶编号分组合并部分聚合：人数相加，年龄矩按 Chan 并行公式合并"""
+    ids, inverse = np.unique(ids, return_inverse=True)
+    n = np.bincount(inverse, weights=counts)
+    mean = np.bincount(inverse, weights=counts * age_mean) / n
+    m2 = np.bincount(inverse, weights=age_m2 + counts * (age_mean - mean[inverse]) ** 2)
+    return Buckets(ids, n.astype(np.int64), mean, m2)
+
+
+def encode_buckets(keys, values):
+    """
+    将 encode_frame 的紧凑数组按 (年龄, 性别, 肺癌, 13 个危险因素) 分桶。
+    危险因素取值只有 1/2（追加接口已校验），同一桶内除非整数年龄外各列取值相同，
+    因此桶的人数与年龄矩就能还原该桶对计数立方体和协矩的全部贡献。
+    """
+    bits = ((values[:, 2:2 + FLAG_BITS] == 2) << np.arange(FLAG_BITS)).sum(axis=1)
+    ids = keys.astype(np.int64) << FLAG_BITS | bits
+    age = values[:, 0].astype(np.float64)
+    return _group_buckets(ids, np.ones(len(ids)), age, np.zeros(len(ids)))
+
+
+def merge_buckets(*parts):
+    """合并多份分桶聚合，代价只与桶数有关"""
+    return _group_buckets(*(np.concatenate(column) for column in zip(*parts)))
+
+
+class CohortIndex:
+    """
+    分桶部分聚合上的位图索引。
+
+    数据按 (年龄, 性别, 肺癌, 危险因素组合) 分桶，每桶只保存人数与年龄矩，
+    桶数上限与行数无关，可逐块构建，追加数据时与新批次的分桶直接合并。
+    每个性别、每个危险因素的每个取值、每一岁各对应一个按桶排列的位图，
+    一个筛选条件就是若干次位图 AND（年龄区间为相邻年龄位图的 OR），
+    再把命中的桶合并为聚合结果，代价为 O(桶数) 而不是 O(行数)。
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.size = len(buckets.ids)
+        self.keys = buckets.ids >> FLAG_BITS
+        self.bits = buckets.ids & ((1 << FLAG_BITS) - 1)
+        self.n = int(buckets.counts.sum())
+
+        gender = (self.keys >> 1) & 1
+        self.age_bitmaps = np.stack([np.packbits((self.keys >> 2) == age) for age in range(AGE_DOMAIN)])
+        self.bitmaps = {
+            ('GENDER', 'M'): np.packbits(gender == 1),
+            ('GENDER', 'F'): np.packbits(gender == 0),
+        }
+        for k, factor in enumerate(RISK_FACTORS):
+            present = ((self.bits >> k) & 1).astype(bool)
+            self.bitmaps[(factor, 1)] = np.packbits(~present)
+            self.bitmaps[(factor, 2)] = np.packbits(present)
+        self.all_rows = np.packbits(np.ones(self.size, dtype=bool))
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(encode_buckets(*encode_frame(df)))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """逐块分桶并合并，内存占用只与块大小和桶数有关"""
+        buckets = Buckets(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+        for chunk in chunks:
+            buckets = merge_buckets(buckets, encode_buckets(*encode_frame(chunk)))
+        return cls(buckets)
+
+    def merge(self, batch):
+        """并入一批新数据（已完成 prepare_dataset 的 DataFrame），返回新的索引"""
+        return CohortIndex(merge_buckets(self.buckets, encode_buckets(*encode_frame(batch))))
+
+    def select(self, cohort):
+        """返回满足筛选条件的桶位图"""
+        bitmap = self.all_rows
+        if cohort.gender:
+            bitmap = bitmap & self.bitmaps[('GENDER', cohort.gender)]
+        for column, value in cohort.flags:
+            bitmap = bitmap & self.bitmaps[(column, value)]
+        if cohort.age_min is not None or cohort.age_max is not None:
+            lower = max(cohort.age_min if cohort.age_min is not None else 0, 0)
+            upper = min(cohort.age_max if cohort.age_max is not None else AGE_DOMAIN - 1, AGE_DOMAIN - 1)
+            if lower > upper:
+                return np.zeros_like(bitmap)
+            bitmap = bitmap & np.bitwise_or.reduce(self.age_bitmaps[lower:upper + 1], axis=0)
+        return bitmap
+
+    def aggregate(self, cohort):
+        """把命中的桶合并为聚合结果：每个桶相当于一组取值相同的行，按人数加权"""
+        rows = np.flatnonzero(np.unpackbits(self.select(cohort), count=self.size))
+        keys, bits = self.keys[rows], self.bits[rows]
+        values = np.column_stack([
+            self.buckets.age_mean[rows],
+            (keys >> 1) & 1,
+            1 + ((bits[:, None] >> np.arange(FLAG_BITS)) & 1),
+            keys & 1,
+        ])
+        return DatasetAggregates.from_arrays(keys, values, weights=self.buckets.counts[rows],
+                                             age_m2=self.buckets.age_m2[rows].sum())
+
+
+# 按数据集版本缓存的位图索引
+_index = {}
+_index_lock = threading.Lock()
+
+
+def get_cohort_index():
+    """获取当前数据集版本的位图索引，加载失败时返回 None"""
+    version = get_dataset_version()
+    if version is None:
+        return None
+
+    index = _index.get(version)
+    if index is None:
+        with _index_lock:
+            index = _index.get(version)
+            if index is None:
+                try:
+                    if is_large_dataset():
+                        index = CohortIndex.from_chunks(iter_dataset_chunks())
+                    else:
+                        index = CohortIndex.from_frame(get_dataset_snapshot().df)
+                except Exception as e:
+                    print(f"加载数据时出错: {e}")
+                    return None
+                _index.clear()
+                _index[version] = index
+    return index
+
+
+def append_to_cohort_index(batch, write_batch):
+    """
+    写入新数据并将其分桶并入当前版本的索引，代价只与批量大小和桶数有关。
+    写入在索引锁内完成，避免与并发的索引构建交错读取文件；返回 (旧版本号, 新版本号)。
+    """
+    with _index_lock:
+        old_version, new_version = write_batch()
+        index = _index.get(old_version)
+        _index.clear()
+        if index is not None:
+            _index[new_version] = index.merge(batch)
+    return old_version, new_version
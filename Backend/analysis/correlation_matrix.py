@@ -1,22 +1,19 @@
-import numpy as np
-from .data_loader import load_dataset
+import math
+from .aggregates import get_aggregates, MOMENT_COLUMNS
 
-def get_correlation_matrix():
-    """获取特征相关性矩阵数据"""
-    df = load_dataset()
+def get_correlation_matrix(cohort=None, aggregates=None):
+    """获取特征相关性矩阵数据，cohort 为可选的患者筛选条件，aggregates 为调用方已取得的聚合结果"""
+    if aggregates is None:
+        aggregates = get_aggregates(cohort)
     
-    if df is None:
+    if aggregates is None:
         return {"error": "无法加载数据"}
     
     # 转换分类特征为数字以计算相关性
-    numeric_columns = ['AGE', 'GENDER_NUMERIC', 'SMOKING', 'YELLOW_FINGERS', 
-                      'ANXIETY', 'PEER_PRESSURE', 'CHRONIC DISEASE', 
-                      'FATIGUE', 'ALLERGY', 'WHEEZING', 'ALCOHOL CONSUMING',
-                      'COUGHING', 'SHORTNESS OF BREATH', 'SWALLOWING DIFFICULTY',
-                      'CHEST PAIN', 'LUNG_CANCER_NUMERIC']
+    numeric_columns = MOMENT_COLUMNS
     
-    # 计算相关性矩阵
-    corr_matrix = df[numeric_columns].corr()
+    # 由预先聚合的协矩计算相关性矩阵
+    corr_matrix = aggregates.correlation()
     
     # 美化特征名称
     feature_names = {
@@ -46,19 +43,17 @@ def get_correlation_matrix():
         for j, col in enumerate(numeric_columns):
             # 只需要下三角矩阵的数据
             if i >= j:
-                data.append([j, i, round(corr_matrix.loc[row, col], 2)])
-    
-    # 返回相关性最高的特征对
-    corr_without_diagonal = corr_matrix.copy()
-    np.fill_diagonal(corr_without_diagonal.values, 0)  # 去除对角线的自相关
+                # 筛选后取值恒定的特征相关系数无定义，返回 null 而不是非法的 NaN
+                value = float(corr_matrix[i, j])
+                data.append([j, i, round(value, 2) if not math.isnan(value) else None])
     
     # 获取相关性最高的特征对
     high_corr = []
     for i, row in enumerate(numeric_columns):
         for j, col in enumerate(numeric_columns):
             if i > j:  # 只取下三角
-                corr_value = corr_matrix.loc[row, col]
-                if abs(corr_value) >= 0.5:  # 只关注相关性较高的特征
+                corr_value = float(corr_matrix[i, j])
+                if not math.isnan(corr_value) and abs(corr_value) >= 0.5:  # 只关注相关性较高的特征
                     high_corr.append({
                         "feature1": feature_names[row],
                         "feature2": feature_names[col],
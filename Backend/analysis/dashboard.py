@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .aggregates import get_aggregates
+from .age_distribution import get_age_distribution
+from .gender_cancer import get_gender_cancer_stats
+from .correlation_matrix import get_correlation_matrix
+from .age_group_stats import get_age_group_stats
+from .smoking_stats import get_smoking_stats
+from .patient_counts import get_patient_counts
+
+# 模块名 -> (返回字段名, 计算函数)，模块名与单独接口的路径一致
+DASHBOARD_SECTIONS = {
+    'age-distribution': ('ageDistribution', get_age_distribution),
+    'gender-cancer': ('genderCancer', get_gender_cancer_stats),
+    'correlation-matrix': ('correlationMatrix', get_correlation_matrix),
+    'age-group-stats': ('ageGroupStats', get_age_group_stats),
+    'smoking-stats': ('smokingStats', get_smoking_stats),
+    'patient-counts': ('patientCounts', get_patient_counts),
+}
+
+# 数据集行数超过该值时，各模块并发计算
+CONCURRENT_ROWS_THRESHOLD = 1_000_000
+
+
+def parse_sections(sections_arg):
+    """解析 sections=a,b,c 参数，返回按固定顺序排列的模块名列表"""
+    if not sections_arg:
+        return list(DASHBOARD_SECTIONS)
+
+    requested = {name.strip() for name in sections_arg.split(',') if name.strip()}
+    unknown = requested - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise ValueError(f"未知的分析模块: {', '.join(sorted(unknown))}")
+    return [name for name in DASHBOARD_SECTIONS if name in requested]
+
+
+def get_dashboard(sections=None, cohort=None):
+    """一次请求生成多个分析模块的数据，所有模块共享同一份聚合结果，cohort 为可选的患者筛选条件"""
+    if sections is None:
+        sections = list(DASHBOARD_SECTIONS)
+
+    # 先统一取得（筛选后的）聚合结果，各模块只从中派生，不再各自筛选与聚合
+    aggregates = get_aggregates(cohort)
+    if aggregates is None:
+        return {"error": "无法加载数据"}
+
+    funcs = [DASHBOARD_SECTIONS[name][1] for name in sections]
+    if aggregates.n >= CONCURRENT_ROWS_THRESHOLD and len(funcs) > 1:
+        with ThreadPoolExecutor(max_workers=len(funcs)) as executor:
+            results = list(executor.map(lambda func: func(cohort, aggregates), funcs))
+    else:
+        results = [func(cohort, aggregates) for func in funcs]
+
+    return {DASHBOARD_SECTIONS[name][0]: result for name, result in zip(sections, results)}
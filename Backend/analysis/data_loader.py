@@ -1,27 +1,201 @@
+import csv
+import hashlib
+import io
+import os
+import threading
+from collections import namedtuple
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from utils.columnar_cache import LUNG_CANCER_SCHEMA, load_columnar
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_PATH = BASE_DIR / 'data' / 'lung_cancer.csv'
+
+# 超过该大小的数据文件不整体载入内存，而是分块流式聚合
+LARGE_DATASET_BYTES = 256 * 1024 * 1024
+
+# 流式读取时每块的行数，决定峰值内存
+CHUNK_ROWS = 200_000
+
+# 数据集字段（与 main.py 中训练时校验的 expected_columns 一致）
+EXPECTED_COLUMNS = ['GENDER', 'AGE', 'SMOKING', 'YELLOW_FINGERS', 'ANXIETY',
+                    'PEER_PRESSURE', 'CHRONIC DISEASE', 'FATIGUE', 'ALLERGY',
+                    'WHEEZING', 'ALCOHOL CONSUMING', 'COUGHING',
+                    'SHORTNESS OF BREATH', 'SWALLOWING DIFFICULTY',
+                    'CHEST PAIN', 'LUNG_CANCER']
+
+# 数据集快照：只读的 DataFrame 及其版本号（文件内容哈希）
+DatasetSnapshot = namedtuple('DatasetSnapshot', ['df', 'version'])
+
+# 进程级缓存：路径 -> (文件状态, 快照)
+_cache = {}
+# 版本号缓存：路径 -> (文件状态, 版本号)
+_versions = {}
+_cache_lock = threading.Lock()
+
+
+def _file_state(data_path):
+    """文件的 (mtime, size)，用于廉价地判断文件是否变化"""
+    stat = os.stat(data_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _to_numeric(column, mapping):
+    """
+    按 mapping 把字符串列或类别列转为数值列：全部命中时为 int64，否则为含 NaN 的 float64，
+    与对字符串列直接 map 相同。类别列 map 后仍是类别列（不能求均值），需转回类别值的类型。
+    """
+    mapped = column.map(mapping)
+    if isinstance(mapped.dtype, pd.CategoricalDtype):
+        mapped = mapped.astype(mapped.cat.categories.dtype)
+    return mapped
+
+
+def prepare_dataset(df):
+    """清理列名并生成派生列"""
+    df.columns = df.columns.str.strip()
+
+    # 将LUNG_CANCER转换为数字
+    df['LUNG_CANCER_NUMERIC'] = _to_numeric(df['LUNG_CANCER'], {'YES': 1, 'NO': 0})
+
+    # 将GENDER转换为数字
+    df['GENDER_NUMERIC'] = _to_numeric(df['GENDER'], {'M': 1, 'F': 0})
+
+    # 为了更好地处理，同时保留原始分类
+    df['GENDER_LABEL'] = df['GENDER'].map({'M': '男', 'F': '女'})
+    df['LUNG_CANCER_LABEL'] = df['LUNG_CANCER'].map({'YES': '肺癌', 'NO': '非肺癌'})
+    return df
+
+
+def get_dataset_snapshot(data_path=None):
+    """
+    获取共享的数据集快照，文件未变化时不会重新解析。
+    返回的 DataFrame 由所有调用方共享，只能读取，不能修改。
+    """
+    data_path = Path(data_path or DATA_PATH)
+    state = _file_state(data_path)
+
+    entry = _cache.get(data_path)
+    if entry is not None and entry[0] == state:
+        return entry[1]
+
+    with _cache_lock:
+        # 双重检查，避免并发请求重复解析
+        entry = _cache.get(data_path)
+        if entry is not None and entry[0] == state:
+            return entry[1]
+
+        version = _current_version(data_path, state)
+
+        # 仅修改时间变化而内容不变时，沿用已有快照
+        if entry is not None and entry[1].version == version:
+            snapshot = entry[1]
+        else:
+            # 从内存映射的列式缓存载入，各列为只读的紧凑类型
+            df = prepare_dataset(load_columnar(data_path, LUNG_CANCER_SCHEMA))
+            snapshot = DatasetSnapshot(df, version)
+
+        _cache[data_path] = (state, snapshot)
+        return snapshot
+
+
+def _hash_file(data_path, block_size=1024 * 1024):
+    """分块计算文件内容哈希，内存占用与文件大小无关"""
+    digest = hashlib.sha1()
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _current_version(data_path, state):
+    """版本号按文件状态缓存；追加写入后由 append_csv_rows 直接更新"""
+    entry = _versions.get(data_path)
+    if entry is not None and entry[0] == state:
+        return entry[1]
+
+    version = _hash_file(data_path)
+    _versions[data_path] = (state, version)
+    return version
+
+
+def get_dataset_version(data_path=None):
+    """获取当前数据集版本号（不解析文件），加载失败时返回 None"""
+    try:
+        data_path = Path(data_path or DATA_PATH)
+        return _current_version(data_path, _file_state(data_path))
+    except Exception as e:
+        print(f"加载数据时出错: {e}")
+        return None
+
+
+def is_large_dataset(data_path=None):
+    """数据文件是否超过整体载入内存的阈值"""
+    return os.path.getsize(data_path or DATA_PATH) > LARGE_DATASET_BYTES
+
+
+def iter_dataset_chunks(data_path=None, chunksize=None):
+    """按块流式读取数据集，每块都已完成与 load_dataset 相同的处理"""
+    reader = pd.read_csv(data_path or DATA_PATH, chunksize=chunksize or CHUNK_ROWS)
+    for chunk in reader:
+        yield prepare_dataset(chunk)
+
+
+def read_csv_header(data_path=None):
+    """读取数据文件的原始表头（保留列名中的空格）"""
+    with open(data_path or DATA_PATH, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f))
+
+
+def append_csv_rows(rows, data_path=None):
+    """
+    以 O(批量) 的代价向数据文件末尾追加若干行，返回 (旧版本号, 新版本号)。
+    新版本号由旧版本号与追加内容的哈希链式生成，无需重新读取整个文件。
+    rows 为按文件表头顺序排列的值列表。
+    """
+    data_path = Path(data_path or DATA_PATH)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    payload = buffer.getvalue().encode('utf-8')
+
+    with _cache_lock:
+        old_version = get_dataset_version(data_path)
+        if old_version is None:
+            raise IOError(f"无法读取数据文件: {data_path}")
+
+        with open(data_path, 'rb+') as f:
+            # 文件末尾缺少换行时先补上，避免与最后一行粘连
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    payload = b'\n' + payload
+            f.write(payload)
+
+        new_version = hashlib.sha1(
+            (old_version + hashlib.sha1(payload).hexdigest()).encode('ascii')
+        ).hexdigest()
+        _versions[data_path] = (_file_state(data_path), new_version)
+        # 内存中的整表快照已过期，下次需要时再重新载入
+        _cache.pop(data_path, None)
+
+    return old_version, new_version
+
+
+def clear_dataset_cache():
+    """清空数据集缓存，下次访问时重新加载"""
+    with _cache_lock:
+        _cache.clear()
+        _versions.clear()
+
+
 def load_dataset():
-    """加载肺癌数据集并进行基本处理"""
-    base_dir = Path(__file__).resolve().parent.parent
-    data_path = base_dir / 'data' / 'lung_cancer.csv'
-    
+    """加载肺癌数据集并进行基本处理（返回可自由修改的副本）"""
     try:
-        df = pd.read_csv(data_path)
-        df.columns = df.columns.str.strip()
-        
-        # 将LUNG_CANCER转换为数字
-        df['LUNG_CANCER_NUMERIC'] = df['LUNG_CANCER'].map({'YES': 1, 'NO': 0})
-        
-        # 将GENDER转换为数字
-        df['GENDER_NUMERIC'] = df['GENDER'].map({'M': 1, 'F': 0})
-        
-        # 为了更好地处理，同时保留原始分类
-        df['GENDER_LABEL'] = df['GENDER'].map({'M': '男', 'F': '女'})
-        df['LUNG_CANCER_LABEL'] = df['LUNG_CANCER'].map({'YES': '肺癌', 'NO': '非肺癌'})
-        
-        return df
+        return get_dataset_snapshot().df.copy()
     except Exception as e:
         print(f"加载数据时出错: {e}")
-        return None 
\ No newline at end of file
+        return None
@@ -1,20 +1,21 @@
-from .data_loader import load_dataset
+from .aggregates import get_aggregates
 
-def get_gender_cancer_stats():
-    """获取性别与肺癌关系的统计数据"""
-    df = load_dataset()
+def get_gender_cancer_stats(cohort=None, aggregates=None):
+    """获取性别与肺癌关系的统计数据，cohort 为可选的患者筛选条件，aggregates 为调用方已取得的聚合结果"""
+    if aggregates is None:
+        aggregates = get_aggregates(cohort)
     
-    if df is None:
+    if aggregates is None:
         return {"error": "无法加载数据"}
     
-    # 计算性别与肺癌的交叉表
-    gender_cancer = df.groupby(['GENDER_LABEL', 'LUNG_CANCER_LABEL']).size().unstack(fill_value=0)
+    # 性别与肺癌的交叉表：行 0=女 1=男，列 0=非肺癌 1=肺癌
+    gender_cancer = aggregates.counts.sum(axis=0)
     
     # 将数据转换为ECharts格式
-    male_cancer = int(gender_cancer.loc['男', '肺癌'])
-    male_non_cancer = int(gender_cancer.loc['男', '非肺癌'])
-    female_cancer = int(gender_cancer.loc['女', '肺癌'])
-    female_non_cancer = int(gender_cancer.loc['女', '非肺癌'])
+    male_cancer = int(gender_cancer[1, 1])
+    male_non_cancer = int(gender_cancer[1, 0])
+    female_cancer = int(gender_cancer[0, 1])
+    female_non_cancer = int(gender_cancer[0, 0])
     
     # 计算百分比
     male_total = male_cancer + male_non_cancer
@@ -58,4 +59,4 @@ def get_gender_cancer_stats():
             "maleNonCancer": male_non_cancer,
             "femaleNonCancer": female_non_cancer,
         }
-    } 
\ No newline at end of file
+    }
@@ -1,26 +1,30 @@
-from .data_loader import load_dataset
+from .aggregates import get_aggregates, RISK_FACTORS
 
-def get_patient_counts():
-    """获取肺癌与非肺癌患者数量统计"""
-    df = load_dataset()
+def get_patient_counts(cohort=None, aggregates=None):
+    """获取肺癌与非肺癌患者数量统计，cohort 为可选的患者筛选条件，aggregates 为调用方已取得的聚合结果"""
+    if aggregates is None:
+        aggregates = get_aggregates(cohort)
     
-    if df is None:
+    if aggregates is None:
         return {"error": "无法加载数据"}
     
+    # 性别 × 肺癌 交叉计数：行 0=女 1=男，列 0=非肺癌 1=肺癌
+    gender_cancer = aggregates.counts.sum(axis=0)
+    
     # 患者总数统计
-    cancer_count = df[df['LUNG_CANCER'] == 'YES'].shape[0]
-    non_cancer_count = df[df['LUNG_CANCER'] == 'NO'].shape[0]
+    cancer_count = int(gender_cancer[:, 1].sum())
+    non_cancer_count = int(gender_cancer[:, 0].sum())
     total_count = cancer_count + non_cancer_count
     
     # 计算比例
-    cancer_percent = round(cancer_count / total_count * 100, 1)
-    non_cancer_percent = round(non_cancer_count / total_count * 100, 1)
+    cancer_percent = round(cancer_count / total_count * 100, 1) if total_count > 0 else 0
+    non_cancer_percent = round(non_cancer_count / total_count * 100, 1) if total_count > 0 else 0
     
     # 按性别统计肺癌和非肺癌患者
-    male_cancer = df[(df['GENDER'] == 'M') & (df['LUNG_CANCER'] == 'YES')].shape[0]
-    male_non_cancer = df[(df['GENDER'] == 'M') & (df['LUNG_CANCER'] == 'NO')].shape[0]
-    female_cancer = df[(df['GENDER'] == 'F') & (df['LUNG_CANCER'] == 'YES')].shape[0]
-    female_non_cancer = df[(df['GENDER'] == 'F') & (df['LUNG_CANCER'] == 'NO')].shape[0]
+    male_cancer = int(gender_cancer[1, 1])
+    male_non_cancer = int(gender_cancer[1, 0])
+    female_cancer = int(gender_cancer[0, 1])
+    female_non_cancer = int(gender_cancer[0, 0])
     
     # 计算各组比例
     male_total = male_cancer + male_non_cancer
@@ -30,12 +34,7 @@ def get_patient_counts():
     female_cancer_percent = round(female_cancer / female_total * 100, 1) if female_total > 0 else 0
     
     # 按肺癌危险因素统计患者数量
-    risk_factors = [
-        'SMOKING', 'YELLOW_FINGERS', 'ANXIETY', 'PEER_PRESSURE',
-        'CHRONIC DISEASE', 'FATIGUE', 'ALLERGY', 'WHEEZING',
-        'ALCOHOL CONSUMING', 'COUGHING', 'SHORTNESS OF BREATH',
-        'SWALLOWING DIFFICULTY', 'CHEST PAIN'
-    ]
+    risk_factors = RISK_FACTORS
     
     # 构建中文标签映射
     factor_labels = {
@@ -54,14 +53,16 @@ def get_patient_counts():
         'CHEST PAIN': '胸痛'
     }
     
+    # 危险因素 × 肺癌 计数：形状 (肺癌, 因素)，仅含值为2（存在此风险因素）的患者
+    factor_cancer = aggregates.factor_counts.sum(axis=(0, 1))
+    
     # 统计各危险因素的患者数量
     risk_factor_stats = []
-    for factor in risk_factors:
-        # 值为2表示存在此风险因素
-        has_factor_cancer = df[(df[factor] == 2) & (df['LUNG_CANCER'] == 'YES')].shape[0]
-        has_factor_non_cancer = df[(df[factor] == 2) & (df['LUNG_CANCER'] == 'NO')].shape[0]
-        no_factor_cancer = df[(df[factor] == 1) & (df['LUNG_CANCER'] == 'YES')].shape[0]
-        no_factor_non_cancer = df[(df[factor] == 1) & (df['LUNG_CANCER'] == 'NO')].shape[0]
+    for k, factor in enumerate(risk_factors):
+        has_factor_cancer = int(factor_cancer[1, k])
+        has_factor_non_cancer = int(factor_cancer[0, k])
+        no_factor_cancer = cancer_count - has_factor_cancer
+        no_factor_non_cancer = non_cancer_count - has_factor_non_cancer
         
         has_factor_total = has_factor_cancer + has_factor_non_cancer
         no_factor_total = no_factor_cancer + no_factor_non_cancer
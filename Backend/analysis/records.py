@@ -0,0 +1,86 @@
+import math
+import numbers
+
+import pandas as pd
+
+from .aggregates import AGE_DOMAIN, RISK_FACTORS, append_to_aggregates, get_aggregates
+from .data_loader import EXPECTED_COLUMNS, prepare_dataset, append_csv_rows, read_csv_header
+
+# 分类字段允许的取值
+CATEGORY_VALUES = {
+    'GENDER': ('M', 'F'),
+    'LUNG_CANCER': ('YES', 'NO'),
+}
+
+
+def _to_int(value, column):
+    """将数值字段转换为整数，拒绝布尔值、非有限值（NaN/Infinity）和带小数的值"""
+    if isinstance(value, bool) or (isinstance(value, numbers.Real) and not math.isfinite(value)):
+        raise ValueError(f"字段 {column} 应为整数: {value!r}")
+    if isinstance(value, numbers.Number):
+        if value != int(value):
+            raise ValueError(f"字段 {column} 应为整数: {value!r}")
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value.strip())
+    raise ValueError(f"字段 {column} 应为整数: {value!r}")
+
+
+def validate_record(record, index=0):
+    """按 EXPECTED_COLUMNS 校验单条患者记录，返回规范化后的记录"""
+    if not isinstance(record, dict):
+        raise ValueError(f"第 {index + 1} 条记录应为字典格式")
+
+    record = {str(key).strip(): value for key, value in record.items()}
+    missing = [col for col in EXPECTED_COLUMNS if col not in record]
+    unknown = [col for col in record if col not in EXPECTED_COLUMNS]
+    if missing or unknown:
+        raise ValueError(f"第 {index + 1} 条记录字段不匹配，缺少: {missing}，多余: {unknown}")
+
+    cleaned = {}
+    for column, allowed in CATEGORY_VALUES.items():
+        value = str(record[column]).strip().upper()
+        if value not in allowed:
+            raise ValueError(f"第 {index + 1} 条记录字段 {column} 取值应为 {'/'.join(allowed)}")
+        cleaned[column] = value
+
+    try:
+        cleaned['AGE'] = _to_int(record['AGE'], 'AGE')
+        if not 0 <= cleaned['AGE'] < AGE_DOMAIN:
+            raise ValueError(f"字段 AGE 超出范围 [0, {AGE_DOMAIN})")
+        for factor in RISK_FACTORS:
+            cleaned[factor] = _to_int(record[factor], factor)
+            if cleaned[factor] not in (1, 2):
+                raise ValueError(f"字段 {factor} 取值应为 1 或 2")
+    except ValueError as e:
+        raise ValueError(f"第 {index + 1} 条记录{e}")
+
+    return cleaned
+
+
+def append_records(records):
+    """
+    校验并追加新的患者记录：写入数据文件末尾，并将这批数据增量并入已有的聚合结果，
+    各分析接口无需重新扫描整个数据集即可反映新数据。
+    返回追加条数、新的数据集版本号及当前总人数。
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not records:
+        raise ValueError("请求体应为患者记录字典或非空的记录列表")
+
+    cleaned = [validate_record(record, i) for i, record in enumerate(records)]
+
+    # 按文件原始表头顺序写入（表头中部分列名带有空格）
+    header = read_csv_header()
+    rows = [[record[column.strip()] for column in header] for record in cleaned]
+
+    batch = prepare_dataset(pd.DataFrame(cleaned, columns=EXPECTED_COLUMNS))
+    version = append_to_aggregates(batch, lambda: append_csv_rows(rows))
+
+    aggregates = get_aggregates()
+    return {
+        "appended": len(cleaned),
+        "version": version,
+        "total": int(aggregates.n) if aggregates is not None else None
+    }
@@ -0,0 +1,49 @@
+import hashlib
+
+from flask import current_app, jsonify, request
+
+from utils.single_flight import StaleWhileRevalidate
+from .data_loader import get_dataset_version
+
+# 最多缓存的响应数（不同筛选条件各占一项）
+MAX_RESPONSES = 1024
+
+# 已序列化的响应：名称 -> (数据集版本, (JSON 字节, ETag))；ETag 为 None 表示错误结果，不缓存。
+# 并发的相同请求共享一次计算；数据集变化后先返回旧响应，由一个后台线程重新计算
+_responses = StaleWhileRevalidate(MAX_RESPONSES, cacheable=lambda entry: entry[1] is not None)
+
+
+def clear_response_cache():
+    """清空已缓存的响应"""
+    _responses.clear()
+
+
+def _render(app, compute):
+    # 后台刷新时不在请求上下文中，需要显式进入应用上下文才能序列化
+    with app.app_context():
+        result = compute()
+        body = jsonify(result).get_data()
+    if isinstance(result, dict) and 'error' in result:
+        return body, None
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def versioned_json_response(name, compute):
+    """
+    按数据集版本缓存 compute() 的 JSON 序列化结果，并支持条件请求：
+    If-None-Match 与 ETag 一致时返回不带正文的 304。
+    """
+    version = get_dataset_version()
+    if version is None:
+        return jsonify(compute())
+
+    app = current_app._get_current_object()
+    body, etag = _responses.get(name, version, lambda: _render(app, compute))
+
+    response = current_app.response_class(body, mimetype='application/json')
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    # 允许缓存，但每次使用前须向服务器验证
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -1,40 +1,28 @@
-import numpy as np
-from .data_loader import load_dataset
+from .aggregates import get_aggregates, boxplot_summary, count_between
 
-def get_smoking_stats():
-    """获取吸烟与肺癌的统计数据"""
-    df = load_dataset()
+def get_smoking_stats(cohort=None, aggregates=None):
+    """获取吸烟与肺癌的统计数据，cohort 为可选的患者筛选条件，aggregates 为调用方已取得的聚合结果"""
+    if aggregates is None:
+        aggregates = get_aggregates(cohort)
     
-    if df is None:
+    if aggregates is None:
         return {"error": "无法加载数据"}
     
-    # 吸烟者与非吸烟者的年龄箱线图数据
-    smoking_df = df[df['SMOKING'] == 2]  # 2表示吸烟
-    non_smoking_df = df[df['SMOKING'] == 1]  # 1表示不吸烟
+    # 吸烟者与非吸烟者的年龄分布（2表示吸烟，1表示不吸烟）
+    smoking_ages = aggregates.age_counts(factor='SMOKING')
+    non_smoking_ages = aggregates.age_counts(factor='SMOKING', has_factor=False)
     
     # 箱型图数据
     boxplot_data = {
-        "吸烟": {
-            "min": int(smoking_df['AGE'].min()),
-            "max": int(smoking_df['AGE'].max()),
-            "median": int(smoking_df['AGE'].median()),
-            "q1": int(smoking_df['AGE'].quantile(0.25)),
-            "q3": int(smoking_df['AGE'].quantile(0.75))
-        },
-        "不吸烟": {
-            "min": int(non_smoking_df['AGE'].min()),
-            "max": int(non_smoking_df['AGE'].max()),
-            "median": int(non_smoking_df['AGE'].median()),
-            "q1": int(non_smoking_df['AGE'].quantile(0.25)),
-            "q3": int(non_smoking_df['AGE'].quantile(0.75))
-        }
+        "吸烟": boxplot_summary(smoking_ages),
+        "不吸烟": boxplot_summary(non_smoking_ages)
     }
     
     # 吸烟状态与肺癌的关系
-    smoking_cancer = smoking_df[smoking_df['LUNG_CANCER'] == 'YES'].shape[0]
-    smoking_non_cancer = smoking_df[smoking_df['LUNG_CANCER'] == 'NO'].shape[0]
-    non_smoking_cancer = non_smoking_df[non_smoking_df['LUNG_CANCER'] == 'YES'].shape[0]
-    non_smoking_non_cancer = non_smoking_df[non_smoking_df['LUNG_CANCER'] == 'NO'].shape[0]
+    smoking_cancer = int(aggregates.age_counts(cancer=1, factor='SMOKING').sum())
+    smoking_non_cancer = int(aggregates.age_counts(cancer=0, factor='SMOKING').sum())
+    non_smoking_cancer = int(aggregates.age_counts(cancer=1, factor='SMOKING', has_factor=False).sum())
+    non_smoking_non_cancer = int(aggregates.age_counts(cancer=0, factor='SMOKING', has_factor=False).sum())
     
     # 计算比例
     smoking_total = smoking_cancer + smoking_non_cancer
@@ -50,10 +38,9 @@ def get_smoking_stats():
     smoking_by_age = []
     for i, (start, end) in enumerate(zip(age_bins[:-1], age_bins[1:])):
         age_group = age_labels[i]
-        age_range_df = df[(df['AGE'] >= start) & (df['AGE'] < end)]
         
-        smoking_count = age_range_df[age_range_df['SMOKING'] == 2].shape[0]
-        non_smoking_count = age_range_df[age_range_df['SMOKING'] == 1].shape[0]
+        smoking_count = count_between(smoking_ages, start, end)
+        non_smoking_count = count_between(non_smoking_ages, start, end)
         
         total_in_age = smoking_count + non_smoking_count
         smoking_percent = round(smoking_count / total_in_age * 100, 1) if total_in_age > 0 else 0
@@ -0,0 +1,317 @@
+"""
+保险数据分析的引擎选择层：数据量小于阈值时在进程内用 pandas/NumPy 计算，
+不启动 JVM；超过阈值时才交给 Spark。两个引擎提供同名函数、返回相同格式的结果。
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from utils.columnar_cache import INSURANCE_SCHEMA, ROW_COLUMN, cached_row_count, load_columnar, load_partitioned
+from analysis.data_loader import get_dataset_version
+from utils.single_flight import StaleWhileRevalidate
+from .result_store import load_result, store_result
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+INSURANCE_CSV = os.path.join(BASE_DIR, 'data', 'insurance.csv')  # Backend/data/insurance.csv
+
+# 行数达到该阈值才使用 Spark，可通过环境变量调整
+SPARK_ROWS_THRESHOLD = int(os.environ.get('SPARK_ROWS_THRESHOLD', 5_000_000))
+
+# 强制使用某个引擎：auto（按行数选择）、pandas、spark
+ANALYSIS_ENGINE = os.environ.get('ANALYSIS_ENGINE', 'auto')
+
+# Spark 每个分区的目标行数，分区数与 shuffle 分区数均按数据量计算
+ROWS_PER_PARTITION = 1_000_000
+MAX_PARTITIONS = 200
+
+# approxQuantile 的默认相对误差，0 表示精确计算
+DEFAULT_RELATIVE_ERROR = 0.001
+
+# 箱线图每组最多返回的离群点个数：超出时只保留离须线界限（1.5 倍四分位距）最远的这些，并标记 outliersTruncated
+MAX_OUTLIERS = 200
+
+# 年龄直方图的默认分组数
+DEFAULT_AGE_BINS = 10
+
+# 可参与相关性计算的数值列，及默认计算的列
+NUMERIC_COLUMNS = [name for name, dtype in INSURANCE_SCHEMA.items() if dtype != 'category']
+CORRELATION_COLUMNS = ['age', 'bmi', 'children', 'charges']
+
+
+# 分区列式数据按这两列分区，对应筛选条件可直接裁剪分区
+PARTITION_BY = ['region', 'smoker']
+
+# region/smoker 筛选参数的合法取值
+INSURANCE_REGIONS = ('northeast', 'northwest', 'southeast', 'southwest')
+SMOKER_VALUES = ('yes', 'no')
+
+# 筛选条件：region/smoker 为取值字符串，age_min/age_max 为闭区间
+InsuranceFilter = namedtuple('InsuranceFilter', ['region', 'smoker', 'age_min', 'age_max'])
+
+NO_FILTER = InsuranceFilter(None, None, None, None)
+
+
+def partition_filters(filters):
+    """筛选条件中可下推到分区裁剪的部分：{分区列: 取值}"""
+    if filters is None:
+        return {}
+    return {column: value for column, value in zip(('region', 'smoker'), (filters.region, filters.smoker))
+            if value is not None}
+
+
+def even_quota(counts, budget):
+    """按各组数量等比例分配 budget 个名额（最大余数法），{组: 名额} 之和恰为 min(budget, 总数)"""
+    total = sum(counts.values())
+    if total <= budget:
+        return dict(counts)
+    quota = {key: count * budget // total for key, count in counts.items()}
+    remainders = sorted(counts, key=lambda key: counts[key] * budget % total, reverse=True)
+    for key in remainders[:budget - sum(quota.values())]:
+        quota[key] += 1
+    return quota
+
+
+def age_mask(ages, filters):
+    """年龄区间条件的布尔掩码（缺失年龄不满足任何区间）"""
+    mask = np.ones(len(ages), dtype=bool)
+    if filters.age_min is not None:
+        mask &= ages >= filters.age_min
+    if filters.age_max is not None:
+        mask &= ages <= filters.age_max
+    return mask
+
+
+def load_insurance_frame(filters=None):
+    """
+    以内存映射方式加载保险数据集，只能读取。
+    无筛选条件时读取列式缓存；有条件时只读取 region/smoker 匹配的分区，再按年龄区间筛选，
+    返回的行保持 CSV 中的顺序。
+    """
+    if filters is None or filters == NO_FILTER:
+        return load_columnar(INSURANCE_CSV, INSURANCE_SCHEMA)
+
+    df = load_partitioned(INSURANCE_CSV, INSURANCE_SCHEMA, PARTITION_BY, partition_filters(filters))
+    if filters.age_min is not None or filters.age_max is not None:
+        df = df[age_mask(df['age'].to_numpy(), filters)]
+    return df.sort_values(ROW_COLUMN, kind='stable').drop(columns=ROW_COLUMN)
+
+
+def dataset_version():
+    """insurance.csv 的内容哈希，读取失败时返回 None"""
+    return get_dataset_version(INSURANCE_CSV)
+
+
+def load_insurance_partitions():
+    """按分区顺序加载全部数据（同一 region/smoker 的行相邻），附带原始行号列 ROW_COLUMN"""
+    return load_partitioned(INSURANCE_CSV, INSURANCE_SCHEMA, PARTITION_BY)
+
+
+def partition_count(rows):
+    """按数据量计算 Spark 分区数，小数据只用一个分区"""
+    return max(1, min(MAX_PARTITIONS, math.ceil(rows / ROWS_PER_PARTITION)))
+
+
+# 估计行数时读取的文件开头字节数
+ROW_SAMPLE_BYTES = 1 << 16
+
+# 最近一次计算的行数：(数据集版本, 行数)
+_row_count = (None, None)
+
+
+def insurance_row_count():
+    """
+    insurance.csv 的行数，不解析整个文件：优先取列式缓存/分区数据 meta.json 中记录的行数，
+    都没有（或已过期）时按文件开头样本的平均行长由文件大小估计。结果按数据集版本缓存。
+    """
+    global _row_count
+    version = dataset_version()
+    if version is not None and _row_count[0] == version:
+        return _row_count[1]
+    rows = cached_row_count(INSURANCE_CSV, INSURANCE_SCHEMA)
+    if rows is None:
+        size = os.path.getsize(INSURANCE_CSV)
+        with open(INSURANCE_CSV, 'rb') as f:
+            sample = f.read(ROW_SAMPLE_BYTES)
+        lines = sample.count(b'\n')
+        # 整个文件都在样本内时为精确值；表头占一行
+        rows = lines - 1 if len(sample) == size else round(size * lines / len(sample)) - 1
+        rows = max(rows, 0)
+    _row_count = (version, rows)
+    return rows
+
+
+def select_engine(rows=None):
+    """返回本次计算使用的引擎名称：'pandas' 或 'spark'；行数取自元数据或估计，不加载数据"""
+    if ANALYSIS_ENGINE in ('pandas', 'spark'):
+        return ANALYSIS_ENGINE
+    if rows is None:
+        rows = insurance_row_count()
+    return 'spark' if rows >= SPARK_ROWS_THRESHOLD else 'pandas'
+
+
+def get_engine():
+    """返回所选引擎的模块；Spark 模块按需导入，小数据集无需安装 pyspark"""
+    if select_engine() == 'spark':
+        from . import spark_analysis
+        return spark_analysis
+    from . import pandas_analysis
+    return pandas_analysis
+
+
+# 预热时预先计算的调用：函数名 -> 默认参数（即各接口不带查询参数时的调用）
+WARMUP_CALLS = {
+    'get_boxplot_data': {'raw': False, 'relative_error': DEFAULT_RELATIVE_ERROR, 'filters': None},
+    'get_scatter_bmi_charges': {'bins': None, 'max_points': None, 'filters': None},
+    'get_age_histogram': {'raw': False, 'bins': None, 'filters': None},
+    'get_region_avg_charges': {'filters': None},
+    'get_scatter_age_charges_smoker': {'bins': None, 'max_points': None, 'filters': None},
+    'get_correlation_data': {'raw': False, 'columns': None, 'spearman': False, 'filters': None},
+}
+
+# 预热进行中时请求最多等待的秒数，超时后不再等待、直接计算（例如 Spark 启动卡住时），可通过环境变量调整
+WARMUP_WAIT_SECONDS = float(os.environ.get('WARMUP_WAIT_SECONDS', 120))
+
+# 预热状态：_warmup_started 置位后，请求等待 _warmup_done 而不是各自建立会话
+_warmup_started = threading.Event()
+_warmup_done = threading.Event()
+_warmup_lock = threading.Lock()
+_warmup_info = {'engine': None, 'seconds': None, 'error': None}
+
+# 内存中最多保留的结果数（不同查询参数各占一项）
+MAX_RESULTS = 1024
+
+# 内存中的结果：查询 -> (数据集版本, 结果)。
+# 并发的相同查询共享一次计算；数据集变化后先返回旧结果，由一个后台线程重新计算
+_results = StaleWhileRevalidate(MAX_RESULTS)
+
+
+def _result_key(name, kwargs):
+    return json.dumps([name, kwargs], sort_keys=True)
+
+
+# 逐行返回数据的散点图函数：未指定 bins/max_points 时结果大小与行数成正比
+ROW_SCATTER_CALLS = ('get_scatter_bmi_charges', 'get_scatter_age_charges_smoker')
+
+
+def is_bounded_result(name, kwargs):
+    """结果大小是否与数据行数无关；raw=True 与逐行返回的散点图结果为 O(行数)"""
+    if kwargs.get('raw'):
+        return False
+    if name in ROW_SCATTER_CALLS:
+        return kwargs.get('bins') is not None or kwargs.get('max_points') is not None
+    return True
+
+
+def _compute(name, kwargs, version):
+    """
+    优先读取磁盘上已存储的结果，没有时由所选引擎计算并写入存储。
+    只持久化大小与行数无关的汇总结果，逐行结果每次由引擎计算（内存中仍按查询缓存）。
+    """
+    bounded = is_bounded_result(name, kwargs)
+    if bounded:
+        hit, result = load_result(INSURANCE_CSV, name, kwargs)
+        if hit:
+            return result
+    result = getattr(get_engine(), name)(**kwargs)
+    if bounded:
+        store_result(INSURANCE_CSV, name, kwargs, result, version=version)
+    return result
+
+
+def _cached(name, kwargs):
+    version = dataset_version()
+    if version is None:
+        return getattr(get_engine(), name)(**kwargs)
+    return _results.get(_result_key(name, kwargs), version, lambda: _compute(name, kwargs, version))
+
+
+def _warmup():
+    start = time.perf_counter()
+    try:
+        _warmup_info['engine'] = select_engine()
+        for name, kwargs in WARMUP_CALLS.items():
+            _cached(name, kwargs)
+    except Exception as e:
+        _warmup_info['error'] = str(e)
+        print(f"分析引擎预热失败: {e}")
+    finally:
+        _warmup_info['seconds'] = round(time.perf_counter() - start, 3)
+        # 无论成功与否都放行等待中的请求
+        _warmup_done.set()
+
+
+def start_warmup():
+    """在后台线程中预热分析引擎并预先计算六个接口的默认结果，重复调用无效"""
+    with _warmup_lock:
+        if _warmup_started.is_set():
+            return
+        _warmup_started.set()
+    threading.Thread(target=_warmup, name='analysis-warmup', daemon=True).start()
+
+
+def warmup_status():
+    """
+    预热状态：started 是否已开始，done 是否已结束（无论成功与否），
+    ready 为未开启预热、或预热已结束且没有出错
+    """
+    started, done = _warmup_started.is_set(), _warmup_done.is_set()
+    return {
+        'started': started,
+        'done': done,
+        'ready': not started or (done and _warmup_info['error'] is None),
+        **_warmup_info
+    }
+
+
+def _dispatch(name, **kwargs):
+    # 预热进行中时等待其完成，避免并发建立第二个会话；超时后直接计算，不让请求线程无限阻塞
+    if _warmup_started.is_set():
+        _warmup_done.wait(WARMUP_WAIT_SECONDS)
+    return _cached(name, kwargs)
+
+
+def _check_scatter_mode(bins, max_points):
+    """bins（网格计数）与 max_points（抽样）是两种互斥的返回格式，不能同时指定"""
+    if bins is not None and max_points is not None:
+        raise ValueError("参数 bins 与 max_points 不能同时指定")
+
+
+def _normalize_filters(filters):
+    return None if filters == NO_FILTER else filters
+
+
+def get_boxplot_data(raw=False, relative_error=DEFAULT_RELATIVE_ERROR, filters=None):
+    return _dispatch('get_boxplot_data', raw=raw, relative_error=relative_error,
+                     filters=_normalize_filters(filters))
+
+
+def get_scatter_bmi_charges(bins=None, max_points=None, filters=None):
+    _check_scatter_mode(bins, max_points)
+    return _dispatch('get_scatter_bmi_charges', bins=bins, max_points=max_points,
+                     filters=_normalize_filters(filters))
+
+
+def get_age_histogram(raw=False, bins=None, filters=None):
+    return _dispatch('get_age_histogram', raw=raw, bins=bins, filters=_normalize_filters(filters))
+
+
+def get_region_avg_charges(filters=None):
+    return _dispatch('get_region_avg_charges', filters=_normalize_filters(filters))
+
+
+def get_scatter_age_charges_smoker(bins=None, max_points=None, filters=None):
+    _check_scatter_mode(bins, max_points)
+    return _dispatch('get_scatter_age_charges_smoker', bins=bins, max_points=max_points,
+                     filters=_normalize_filters(filters))
+
+
+def get_correlation_data(raw=False, columns=None, spearman=False, filters=None):
+    # 默认列与不指定列视为同一查询，共用缓存
+    columns = None if columns is None or list(columns) == CORRELATION_COLUMNS else list(columns)
+    return _dispatch('get_correlation_data', raw=raw, columns=columns, spearman=spearman,
+                     filters=_normalize_filters(filters))
@@ -1,9 +1,15 @@
 from flask import Blueprint, jsonify
-from ..spark_analysis import get_age_histogram
+from ..analysis_engine import get_age_histogram
+from .params import flag_arg, insurance_filter_args, positive_int_arg
 
 age_hist_api = Blueprint('age_hist_api', __name__)
 
 @age_hist_api.route('/', methods=['GET'])
 def age_hist():
-    data = get_age_histogram()
+    try:
+        bins = positive_int_arg('bins', maximum=200)
+        filters = insurance_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = get_age_histogram(raw=flag_arg('raw'), bins=bins, filters=filters)
     return jsonify(data)
@@ -1,9 +1,15 @@
 from flask import Blueprint, jsonify
-from ..spark_analysis import get_boxplot_data
+from ..analysis_engine import get_boxplot_data, DEFAULT_RELATIVE_ERROR
+from .params import flag_arg, fraction_arg, insurance_filter_args
 
 boxplot_api = Blueprint('boxplot_api', __name__)
 
 @boxplot_api.route('/', methods=['GET'])
 def boxplot():
-    data = get_boxplot_data()
+    try:
+        relative_error = fraction_arg('relative_error', DEFAULT_RELATIVE_ERROR)
+        filters = insurance_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = get_boxplot_data(raw=flag_arg('raw'), relative_error=relative_error, filters=filters)
     return jsonify(data)
@@ -1,9 +1,16 @@
 from flask import Blueprint, jsonify
-from ..spark_analysis import get_correlation_data
+from ..analysis_engine import get_correlation_data, NUMERIC_COLUMNS
+from .params import columns_arg, flag_arg, insurance_filter_args
 
 correlation_api = Blueprint('correlation_api', __name__)
 
 @correlation_api.route('/', methods=['GET'])
 def correlation():
-    data = get_correlation_data()
+    try:
+        columns = columns_arg('columns', NUMERIC_COLUMNS)
+        filters = insurance_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = get_correlation_data(raw=flag_arg('raw'), columns=columns, spearman=flag_arg('spearman'),
+                                filters=filters)
     return jsonify(data)
@@ -0,0 +1,89 @@
+from flask import request
+
+from ..analysis_engine import INSURANCE_REGIONS, NO_FILTER, SMOKER_VALUES, InsuranceFilter
+
+
+def flag_arg(name):
+    """读取布尔查询参数，1/true/yes 视为真"""
+    return request.args.get(name, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def positive_int_arg(name, maximum=None):
+    """读取正整数查询参数，未提供时返回 None，取值非法时抛出 ValueError"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 应为正整数")
+    if value <= 0:
+        raise ValueError(f"参数 {name} 应为正整数")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"参数 {name} 不能超过 {maximum}")
+    return value
+
+
+def fraction_arg(name, default):
+    """读取 [0, 1) 区间的小数查询参数，未提供时返回 default，取值非法时抛出 ValueError"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = float(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 应为数字")
+    if not 0 <= value < 1:
+        raise ValueError(f"参数 {name} 应在 [0, 1) 区间内")
+    return value
+
+
+def scatter_mode_args():
+    """读取散点图的 bins 与 max_points 参数，返回 (bins, max_points)；两者互斥，同时提供时抛出 ValueError"""
+    bins = positive_int_arg('bins', maximum=500)
+    max_points = positive_int_arg('max_points', maximum=100000)
+    if bins is not None and max_points is not None:
+        raise ValueError("参数 bins 与 max_points 不能同时指定")
+    return bins, max_points
+
+
+def columns_arg(name, allowed):
+    """读取逗号分隔的列名列表参数，未提供时返回 None，含未知列或重复列时抛出 ValueError"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    columns = [column.strip() for column in value.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in allowed]
+    if unknown:
+        raise ValueError(f"参数 {name} 含未知列: {', '.join(unknown)}，可选: {', '.join(allowed)}")
+    if len(columns) < 2 or len(set(columns)) != len(columns):
+        raise ValueError(f"参数 {name} 应为至少两个不重复的列")
+    return columns
+
+
+def _int_arg(name):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 应为整数")
+
+
+def insurance_filter_args():
+    """解析保险数据的筛选参数，例如 ?region=southeast&smoker=yes&age_min=40&age_max=60；均未提供时返回 None"""
+    region = request.args.get('region', '').strip().lower() or None
+    smoker = request.args.get('smoker', '').strip().lower() or None
+    if region is not None and region not in INSURANCE_REGIONS:
+        raise ValueError(f"参数 region 取值应为 {', '.join(INSURANCE_REGIONS)} 之一")
+    if smoker is not None and smoker not in SMOKER_VALUES:
+        raise ValueError("参数 smoker 取值应为 yes 或 no")
+
+    age_min = _int_arg('age_min')
+    age_max = _int_arg('age_max')
+    if age_min is not None and age_max is not None and age_min > age_max:
+        raise ValueError("参数 age_min 不能大于 age_max")
+
+    filters = InsuranceFilter(region, smoker, age_min, age_max)
+    return None if filters == NO_FILTER else filters
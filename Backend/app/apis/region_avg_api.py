@@ -1,9 +1,14 @@
 from flask import Blueprint, jsonify
-from ..spark_analysis import get_region_avg_charges
+from ..analysis_engine import get_region_avg_charges
+from .params import insurance_filter_args
 
 region_avg_api = Blueprint('region_avg_api', __name__)
 
 @region_avg_api.route('/', methods=['GET'])
 def region_avg():
-    data = get_region_avg_charges()
+    try:
+        filters = insurance_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = get_region_avg_charges(filters=filters)
     return jsonify(data)
@@ -1,9 +1,15 @@
 from flask import Blueprint, jsonify
-from ..spark_analysis import get_scatter_age_charges_smoker
+from ..analysis_engine import get_scatter_age_charges_smoker
+from .params import insurance_filter_args, scatter_mode_args
 
 scatter_age_api = Blueprint('scatter_age_api', __name__)
 
 @scatter_age_api.route('/', methods=['GET'])
 def scatter_age():
-    data = get_scatter_age_charges_smoker()
+    try:
+        bins, max_points = scatter_mode_args()
+        filters = insurance_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = get_scatter_age_charges_smoker(bins=bins, max_points=max_points, filters=filters)
     return jsonify(data)
@@ -1,9 +1,15 @@
 from flask import Blueprint, jsonify
-from ..spark_analysis import get_scatter_bmi_charges
+from ..analysis_engine import get_scatter_bmi_charges
+from .params import insurance_filter_args, scatter_mode_args
 
 scatter_bmi_api = Blueprint('scatter_bmi_api', __name__)
 
 @scatter_bmi_api.route('/', methods=['GET'])
 def scatter_bmi():
-    data = get_scatter_bmi_charges()
+    try:
+        bins, max_points = scatter_mode_args()
+        filters = insurance_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = get_scatter_bmi_charges(bins=bins, max_points=max_points, filters=filters)
     return jsonify(data)
@@ -0,0 +1,11 @@
+from flask import Blueprint, jsonify
+from ..analysis_engine import warmup_status
+
+warmup_api = Blueprint('warmup_api', __name__)
+
+@warmup_api.route('/', methods=['GET'])
+def warmup():
+    # 预热进行中或预热出错时返回 503，便于就绪探针判断；
+    # 未开启预热（未设置 ANALYSIS_WARMUP）时无需等待，返回 200，started 为 false、ready 为 true
+    status = warmup_status()
+    return jsonify(status), 200 if status['ready'] else 503
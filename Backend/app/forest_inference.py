@@ -0,0 +1,189 @@
+"""
+肺癌模型的数组化推理：加载时把 CalibratedClassifierCV（sigmoid 校准）中各折随机森林的全部决策树
+拼接为连续的 NumPy 数组，整批样本按层同时遍历所有树，不再逐棵调用 sklearn 估计器。
+计算顺序与 sklearn 相同（float32 输入、逐树累加、逐折求和后取平均），概率与 predict_proba 一致。
+"""
+import numpy as np
+from scipy.special import expit
+
+
+class CompiledForest:
+    """
+    所有树的节点按树依次拼接为全局节点号，每棵树内按层重新编号，使左右子节点相邻：
+    内部节点的右子节点为 child + 1，叶节点的 child 指向自身。
+    各节点的判断 (特征, 阈值, 缺失值方向) 去重为 condition 表，每批样本先一次算出全部判断结果，
+    遍历时每层只需按节点查表。
+    """
+
+    # 每次遍历的样本数，使中间数组留在 CPU 缓存内
+    CHUNK_ROWS = 256
+    # 前几层几乎没有样本到达叶节点，不做压缩；之后每层只保留未到叶节点的 (样本, 树)
+    FULL_LEVELS = 5
+
+    def __init__(self, model):
+        self.classes_ = model.classes_
+        features, thresholds, missing_left, children, leaves, values = [], [], [], [], [], []
+        roots, offset = [], 0
+        self.calibrations = []
+        for calibrated in model.calibrated_classifiers_:
+            forest = calibrated.estimator
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                order, child = _sibling_order(tree.children_left, tree.children_right)
+                leaf = tree.children_left[order] < 0
+                roots.append(offset)
+                # 叶节点的判断恒为真（阈值 +inf，缺失值也走左侧），停在原地
+                features.append(np.where(leaf, 0, tree.feature[order]))
+                thresholds.append(np.where(leaf, np.inf, tree.threshold[order]))
+                missing_left.append(tree.missing_go_to_left[order].astype(bool) | leaf)
+                children.append(child + offset)
+                leaves.append(leaf)
+                # 二分类时校准器只作用于正类概率
+                values.append(tree.value[order, 0, 1])
+                offset += tree.node_count
+            calibrator = calibrated.calibrators[0]
+            self.calibrations.append((len(forest.estimators_), calibrator.a_, calibrator.b_))
+
+        conditions, node_condition = np.unique(
+            np.column_stack([np.concatenate(features), np.concatenate(thresholds), np.concatenate(missing_left)]),
+            axis=0, return_inverse=True)
+        self.condition_feature = conditions[:, 0].astype(np.intp)
+        self.condition_threshold = conditions[:, 1]
+        self.condition_missing_left = conditions[:, 2].astype(bool)
+        self.node_condition = node_condition.ravel().astype(np.int32)
+        self.child = np.concatenate(children).astype(np.int32)
+        self.leaf = np.concatenate(leaves)
+        self.value = np.concatenate(values)
+        self.roots = np.asarray(roots, dtype=np.int32)
+
+    @staticmethod
+    def supports(model):
+        """只支持二分类、sigmoid 校准、底层为单输出决策树森林的模型"""
+        try:
+            return (len(model.classes_) == 2 and all(
+                c.method == 'sigmoid' and c.estimator.n_outputs_ == 1 and len(c.calibrators) == 1
+                and hasattr(c.estimator, 'estimators_')
+                for c in model.calibrated_classifiers_))
+        except AttributeError:
+            return False
+
+    def _conditions(self, X):
+        """(样本数, 判断数) 的判断结果，True 表示走左子节点"""
+        x = X[:, self.condition_feature]
+        return (x <= self.condition_threshold) | (np.isnan(x) & self.condition_missing_left)
+
+    def _leaves(self, X):
+        n = len(X)
+        conditions = self._conditions(X).ravel()
+        nodes = np.tile(self.roots, n)
+        row_start = np.repeat(np.arange(n, dtype=np.int32) * np.int32(len(self.condition_feature)), len(self.roots))
+        for _ in range(self.FULL_LEVELS):
+            nodes = self.child[nodes] + ~conditions[row_start + self.node_condition[nodes]]
+
+        active = np.flatnonzero(~self.leaf[nodes])
+        current, row_start = nodes[active], row_start[active]
+        while len(active):
+            current = self.child[current] + ~conditions[row_start + self.node_condition[current]]
+            done = self.leaf[current]
+            if done.any():
+                nodes[active[done]] = current[done]
+                keep = ~done
+                active, current, row_start = active[keep], current[keep], row_start[keep]
+        return nodes.reshape(n, len(self.roots))
+
+    def leaves(self, X):
+        """返回 (样本数, 树数) 的叶节点号；与 sklearn 一样先转为 float32 再与阈值比较"""
+        X = np.asarray(X, dtype=np.float32)
+        if not len(X):
+            return np.empty((0, len(self.roots)), dtype=np.int32)
+        return np.concatenate([self._leaves(X[i:i + self.CHUNK_ROWS]) for i in range(0, len(X), self.CHUNK_ROWS)])
+
+    def predict_proba(self, X):
+        leaf_values = self.value[self.leaves(X)].T
+        proba = np.zeros((len(X), 2))
+        start = 0
+        for n_trees, a, b in self.calibrations:
+            # 沿树轴逐行累加，求和顺序与 sklearn 逐棵树累加一致
+            forest = np.add.reduce(leaf_values[start:start + n_trees], axis=0) / n_trees
+            calibrated = expit(-(a * forest + b))
+            proba[:, 0] += 1.0 - calibrated
+            proba[:, 1] += calibrated
+            start += n_trees
+        proba /= len(self.calibrations)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _grid_leaf_values(self, root, axes, out, allowed):
+        """把一棵树在网格上的叶节点值写入 out：allowed 为每个特征当前可取的网格下标（掩码）"""
+        stack = [(root, allowed)]
+        while stack:
+            node, allowed = stack.pop()
+            if self.leaf[node]:
+                out[_grid_index(allowed)] = self.value[node]
+                continue
+            condition = self.node_condition[node]
+            feature = self.condition_feature[condition]
+            x = axes[feature]
+            go_left = (x <= self.condition_threshold[condition]) | (np.isnan(x) & self.condition_missing_left[condition])
+            for child, mask in ((self.child[node], go_left), (self.child[node] + 1, ~go_left)):
+                branch = allowed[feature] & mask
+                if branch.any():
+                    stack.append((child, allowed[:feature] + [branch] + allowed[feature + 1:]))
+
+    def predict_proba_grid(self, axes):
+        """
+        在各特征取值的笛卡尔积上计算各类别概率，axes 按特征顺序给出每个特征的候选取值，
+        返回形状为 [len(axis) for axis in axes] + [2] 的数组。按树的划分整块写入叶节点值，不逐行遍历；
+        逐树累加与校准的顺序同 predict_proba，结果与逐行预测一致。
+        """
+        axes = [np.asarray(axis, dtype=np.float32) for axis in axes]
+        shape = tuple(len(axis) for axis in axes)
+        full = [np.ones(n, dtype=bool) for n in shape]
+        tree_values = np.empty(shape)
+        proba = np.zeros(shape + (2,))
+        tree = 0
+        for n_trees, a, b in self.calibrations:
+            forest = np.zeros(shape)
+            for root in self.roots[tree:tree + n_trees]:
+                self._grid_leaf_values(root, axes, tree_values, full)
+                forest += tree_values
+            forest /= n_trees
+            calibrated = expit(-(a * forest + b))
+            proba[..., 0] += 1.0 - calibrated
+            proba[..., 1] += calibrated
+            tree += n_trees
+        proba /= len(self.calibrations)
+        return proba
+
+
+def _sibling_order(children_left, children_right):
+    """
+    按层重新编号使每个内部节点的左右子节点相邻，返回 (新编号 -> 原节点号, 新编号下的左子节点号)，
+    叶节点的左子节点号为自身
+    """
+    order = [0]
+    child = [0]
+    for new_id, node in enumerate(order):
+        left = children_left[node]
+        if left < 0:
+            child[new_id] = new_id
+            continue
+        child[new_id] = len(order)
+        order.extend((left, children_right[node]))
+        child.extend((0, 0))
+    return np.asarray(order), np.asarray(child)
+
+
+def _grid_index(masks):
+    """各维掩码 -> 网格下标：都连续时用切片（写入视图），否则用 np.ix_ 取笛卡尔积"""
+    positions = [np.flatnonzero(mask) for mask in masks]
+    if all(p[-1] - p[0] + 1 == len(p) for p in positions):
+        return tuple(slice(p[0], p[-1] + 1) for p in positions)
+    return np.ix_(*positions)
+
+
+def compile_model(model):
+    """模型结构受支持时返回 CompiledForest，否则返回 None（调用方继续使用原模型）"""
+    return CompiledForest(model) if CompiledForest.supports(model) else None
@@ -0,0 +1,244 @@
+"""
+保险数据分析的进程内引擎：在内存映射的列式缓存上用 pandas/NumPy 向量化计算，
+函数与 spark_analysis 同名，返回格式与取值一致。filters 为 InsuranceFilter 筛选条件，
+region/smoker 条件只读取匹配的分区。
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from .analysis_engine import (CORRELATION_COLUMNS, DEFAULT_AGE_BINS, DEFAULT_RELATIVE_ERROR, MAX_OUTLIERS,
+                              even_quota, load_insurance_frame)
+
+
+def _collect_rows(df):
+    """转为 Python 原生类型的行列表（与 Spark 引擎的 _collect_rows 一致）"""
+    return [list(row) for row in df.itertuples(index=False, name=None)]
+
+
+def _quantiles(sorted_values, qs):
+    """
+    与 Spark percentile_approx 精确情形一致的分位数：取排序后第 ceil(q·n) 个值（不插值）。
+    进程内始终精确计算，结果不超过任何相对误差要求。
+    """
+    n = len(sorted_values)
+    return [sorted_values[max(math.ceil(q * n), 1) - 1].item() for q in qs]
+
+
+def _bin_index(values, low, high, bins):
+    """把 [low, high] 均分为 bins 段，返回所在段号（最大值归入最后一段），与 Spark 引擎计算方式相同"""
+    width = (high - low) / bins if high > low else 1.0
+    index = np.floor((values.astype(np.float64) - low) / width).astype(np.int64)
+    return np.minimum(index, bins - 1)
+
+
+def _groups(df, column):
+    """按分组列拆分（只保留出现过的取值，组内保持原有行序）"""
+    return df.groupby(column, observed=True, sort=False)
+
+
+def get_boxplot_data(raw=False, relative_error=DEFAULT_RELATIVE_ERROR, filters=None):
+    """
+    按吸烟分组的医保费用箱线图统计：四分位数、须线（1.5 倍四分位距内的最值）、离群点。
+    离群点超过 MAX_OUTLIERS 个时只返回离界限最远的 MAX_OUTLIERS 个（距离相同时取 CSV 中靠前的行），
+    按取值升序排列，outliersTruncated 为真。
+    raw=True 时返回原来的 {smoker: [charges]} 格式。
+    """
+    df = load_insurance_frame(filters)[['smoker', 'charges']].dropna()
+    if raw:
+        return {smoker: group['charges'].tolist() for smoker, group in _groups(df, 'smoker')}
+
+    result = {}
+    for smoker, group in _groups(df, 'smoker'):
+        charges = group['charges'].to_numpy()
+        sorted_charges = np.sort(charges)
+        q1, median, q3 = _quantiles(sorted_charges, (0.25, 0.5, 0.75))
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = sorted_charges[(sorted_charges >= low) & (sorted_charges <= high)]
+        # 离群点按 CSV 中的顺序取出，按超出界限的距离从远到近稳定排序后截取
+        outliers = charges[(charges < low) | (charges > high)]
+        distance = np.maximum(low - outliers, outliers - high)
+        extreme = np.sort(outliers[np.argsort(-distance, kind='stable')[:MAX_OUTLIERS]])
+        result[smoker] = {
+            "count": len(charges),
+            "mean": float(charges.mean()),
+            "min": sorted_charges[0].item(),
+            "max": sorted_charges[-1].item(),
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "lowerWhisker": inside[0].item(),
+            "upperWhisker": inside[-1].item(),
+            "outlierCount": len(outliers),
+            "outliersTruncated": len(outliers) > MAX_OUTLIERS,
+            "outliers": extreme.tolist()
+        }
+    return result
+
+
+def _grid_bins(df, x, y, bins, group=None):
+    """把 (x, y) 平面均分为 bins × bins 个网格并计数，cells 中每项为 [x 网格号, y 网格号, (分组值,) 点数]"""
+    if df.empty:
+        return {"mode": "bins", "bins": bins, "xRange": None, "yRange": None, "cells": []}
+
+    x_min, x_max = df[x].min().item(), df[x].max().item()
+    y_min, y_max = df[y].min().item(), df[y].max().item()
+    keys = [_bin_index(df[x].to_numpy(), x_min, x_max, bins),
+            _bin_index(df[y].to_numpy(), y_min, y_max, bins)]
+    if group is not None:
+        keys.append(df[group].astype(object).to_numpy())
+    counts = pd.Series(1, index=df.index).groupby(keys).size()
+    return {
+        "mode": "bins",
+        "bins": bins,
+        "xRange": [x_min, x_max],
+        "yRange": [y_min, y_max],
+        "cells": [[*(k.item() if isinstance(k, np.generic) else k for k in key), int(count)]
+                  for key, count in counts.items()]
+    }
+
+
+def _sample_preserving_outliers(df, max_points, value='charges', group=None, seed=42):
+    """
+    抽样到最多 max_points 行，返回 (抽样结果, 抽样信息)：各分组内按 Tukey 规则判定的离群点优先保留，
+    其余点在各分组内按相同比例随机抽取（抽中的具体行与 Spark 引擎不同）。
+    离群点本身超过 max_points 时不再抽取其余点，离群点按分组等比例分配名额，
+    组内按取值排序后等间隔抽取，覆盖整个取值范围（Spark 引擎只在随机候选中等间隔抽取，避免对全部离群点排序）；
+    抽样信息中给出离群点总数与返回的离群点数。
+    """
+    total = len(df)
+    keys = df[group] if group is not None else pd.Series('all', index=df.index)
+    outlier = np.zeros(total, dtype=bool)
+    groups = pd.Series(np.arange(total)).groupby(keys.to_numpy())
+    for _, positions in groups:
+        values = df[value].to_numpy()[positions.to_numpy()]
+        q1, q3 = _quantiles(np.sort(values), (0.25, 0.75))
+        iqr = q3 - q1
+        outlier[positions.to_numpy()] = (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+
+    n_outliers = int(outlier.sum())
+    if total <= max_points:
+        return df, _sample_info(total, n_outliers, n_outliers)
+
+    if n_outliers > max_points:
+        counts = {key: int(outlier[positions.to_numpy()].sum()) for key, positions in groups}
+        quota = even_quota(counts, max_points)
+        keep = np.zeros(total, dtype=bool)
+        for key, positions in groups:
+            positions = positions.to_numpy()[outlier[positions.to_numpy()]]
+            if quota.get(key):
+                # 组内第 r 个（从 0 计）离群点在 floor(r·k/n) 变化处入选，恰好选出 k 个
+                ranked = positions[np.argsort(df[value].to_numpy()[positions], kind='stable')]
+                rank = np.arange(len(ranked))
+                keep[ranked[rank * quota[key] // len(ranked) != (rank - 1) * quota[key] // len(ranked)]] = True
+        return df[keep], _sample_info(total, n_outliers, int(keep.sum()))
+
+    fraction = min(1.0, (max_points - n_outliers) / max(total - n_outliers, 1))
+    rng = np.random.default_rng(seed)
+    keep = outlier.copy()
+    keep[np.flatnonzero(~outlier & (rng.random(total) < fraction))[:max_points - n_outliers]] = True
+    return df[keep], _sample_info(total, n_outliers, n_outliers)
+
+
+def _sample_info(total, n_outliers, sampled_outliers):
+    """抽样模式附带的信息（与 Spark 引擎一致）"""
+    return {"count": total, "outlierCount": n_outliers, "sampledOutliers": sampled_outliers}
+
+
+def _sample_payload(df, max_points, group=None):
+    sample, info = _sample_preserving_outliers(df, max_points, group=group)
+    return {"mode": "sample", "maxPoints": max_points, **info, "points": _collect_rows(sample)}
+
+
+def get_scatter_bmi_charges(bins=None, max_points=None, filters=None):
+    """
+    默认返回全部 [bmi, charges] 点；
+    bins 指定时返回网格计数，max_points 指定时返回保留离群点的抽样（两者互斥，由 analysis_engine 校验）：
+    points 为与默认格式相同的点，count / outlierCount / sampledOutliers 为总行数、离群点数与返回的离群点数。
+    """
+    df = load_insurance_frame(filters)[['bmi', 'charges']].dropna()
+    if bins:
+        return _grid_bins(df, 'bmi', 'charges', bins)
+    if max_points:
+        return _sample_payload(df, max_points)
+    return _collect_rows(df)
+
+
+def get_age_histogram(raw=False, bins=None, filters=None):
+    """
+    年龄直方图：按等宽分组计数，edges 为 bins + 1 个分组边界。
+    raw=True 时返回原来的全部年龄列表。
+    """
+    ages = load_insurance_frame(filters)['age'].dropna()
+    if raw:
+        return ages.tolist()
+
+    bins = bins or DEFAULT_AGE_BINS
+    if ages.empty:
+        return {"count": 0, "mean": None, "min": None, "max": None, "edges": [], "counts": []}
+
+    values = ages.to_numpy()
+    age_min, age_max = values.min().item(), values.max().item()
+    counts = np.bincount(_bin_index(values, age_min, age_max, bins), minlength=bins)
+    width = (age_max - age_min) / bins if age_max > age_min else 1.0
+    return {
+        "count": len(values),
+        "mean": float(values.mean(dtype=np.float64)),
+        "min": age_min,
+        "max": age_max,
+        "edges": [age_min + width * i for i in range(bins + 1)],
+        "counts": counts.tolist()
+    }
+
+
+def get_region_avg_charges(filters=None):
+    df = load_insurance_frame(filters)[['region', 'charges']].dropna()
+    means = df.groupby('region', observed=True)['charges'].mean()
+    # 与原实现一致，使用 Python 的 round 保留两位小数
+    return {region: round(float(avg), 2) for region, avg in means.items()}
+
+
+def get_scatter_age_charges_smoker(bins=None, max_points=None, filters=None):
+    """
+    默认返回全部 [age, charges, smoker] 点；
+    bins 指定时按吸烟分组返回网格计数，max_points 指定时在各吸烟分组内保留离群点并等比例抽样（两者互斥）。
+    """
+    df = load_insurance_frame(filters)[['age', 'charges', 'smoker']].dropna()
+    if bins:
+        return _grid_bins(df, 'age', 'charges', bins, group='smoker')
+    if max_points:
+        return _sample_payload(df, max_points, group='smoker')
+    return _collect_rows(df)
+
+
+def _correlation(values):
+    """由一次中心化协矩计算 Pearson 相关系数矩阵，取值恒定的列相关系数无定义，记为 None"""
+    centered = values - values.mean(axis=0)
+    comoment = centered.T @ centered
+    scale = np.sqrt(np.diag(comoment))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matrix = comoment / np.outer(scale, scale)
+    np.fill_diagonal(matrix, np.where(scale > 0, 1.0, np.nan))
+    return [[None if math.isnan(v) else float(v) for v in row] for row in matrix]
+
+
+def get_correlation_data(raw=False, columns=None, spearman=False, filters=None):
+    """
+    数值列的相关系数矩阵：pearson 为 Pearson 相关系数，spearman=True 时另返回 Spearman 秩相关系数，
+    count 为参与计算的行数（任一列缺失的行不计入）。
+    raw=True 时返回原来的 [age, bmi, children, charges] 行列表。
+    """
+    columns = columns or CORRELATION_COLUMNS
+    df = load_insurance_frame(filters)[columns].dropna()
+    if raw:
+        return _collect_rows(df)
+
+    result = {"columns": columns, "count": len(df), "pearson": None}
+    if len(df) > 1:
+        result["pearson"] = _correlation(df.to_numpy(dtype=np.float64))
+    if spearman:
+        # Spearman 即平均秩（并列取平均）上的 Pearson 相关系数
+        result["spearman"] = _correlation(df.rank(method='average').to_numpy(dtype=np.float64)) \
+            if len(df) > 1 else None
+    return result
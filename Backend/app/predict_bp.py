@@ -1,13 +1,49 @@
 from flask import Blueprint, request, jsonify
+import io
+import logging
+import math
+import os
+import numpy as np
 import pandas as pd
 import joblib
 
-def create_predict_bp(model_path='./models/best_lung_cancer_model.pkl', scaler_path='./models/scaler.pkl'):
+from utils.micro_batch import MicroBatcher
+from .forest_inference import compile_model
+from .prediction_table import PredictionTable
+from .surrogate import load_surrogate
+
+# 批量预测单次最多接受的患者数
+MAX_BATCH_SIZE = 100_000
+
+# 单条预测的微批窗口（毫秒）与每批最多行数，窗口为 0 时不合并请求
+BATCH_WINDOW_MS = float(os.environ.get('PREDICT_BATCH_WINDOW_MS', 2))
+BATCH_MAX_ROWS = int(os.environ.get('PREDICT_BATCH_MAX_ROWS', 512))
+
+# 不超过该行数时使用数组化推理，更大的批次 sklearn 逐树遍历更快（单核实测交叉点约 2000 行）
+COMPILED_MAX_ROWS = int(os.environ.get('PREDICT_COMPILED_MAX_ROWS', 2000))
+
+# 设为 1 时加载模型后预计算整个输入空间的查找表，单条预测直接查表；表中概率的存储类型
+LOOKUP_TABLE = os.environ.get('PREDICT_LOOKUP_TABLE', '0') == '1'
+LOOKUP_TABLE_DTYPE = os.environ.get('PREDICT_LOOKUP_TABLE_DTYPE', 'float32')
+
+# 设为 1 时优先使用 main.py 蒸馏出的替代模型（需保真度报告达到门槛，否则仍用原模型）
+SURROGATE = os.environ.get('PREDICT_SURROGATE', '0') == '1'
+
+def create_predict_bp(model_path='./models/best_lung_cancer_model.pkl', scaler_path='./models/scaler.pkl',
+                      batch_window_ms=None, batch_max_rows=None, lookup_table=None, surrogate=None):
     predict_bp = Blueprint('predict_bp', __name__)
 
-    # 加载模型和标准化器
-    model = joblib.load(model_path)
+    # 加载模型和标准化器；使用替代模型时不再加载原模型
+    model = None
+    if SURROGATE if surrogate is None else surrogate:
+        model, report = load_surrogate(os.path.dirname(model_path))
+        if model is None:
+            logging.warning("替代模型不存在或未达到保真度门槛，使用原模型：%s", report)
+    if model is None:
+        model = joblib.load(model_path)
     scaler = joblib.load(scaler_path)
+    # 结构受支持时把森林展开为数组，概率与 model.predict_proba 一致
+    compiled = compile_model(model)
 
     # 映射前端字段 -> 表头字段
     COLUMN_MAP = {
@@ -35,25 +71,93 @@ def create_predict_bp(model_path='./models/best_lung_cancer_model.pkl', scaler_p
         "SHORTNESS OF BREATH", "SWALLOWING DIFFICULTY", "CHEST PAIN"
     ]
 
-    def preprocess_input(data_dict):
-        # 映射字段名
-        data_mapped = {COLUMN_MAP[k]: v for k, v in data_dict.items() if k in COLUMN_MAP}
+    # 表头字段 -> 前端字段，CSV 两种表头均可
+    HEADER_MAP = {v: k for k, v in COLUMN_MAP.items()}
 
-        # 保证顺序和训练一致，缺失项设默认值（例如 0）
-        ordered_data = {col: data_mapped.get(col, 0) for col in TRAIN_COLUMNS}
-        df_input = pd.DataFrame([ordered_data])
+    def normalize_gender(values):
+        """GENDER 统一去除空格并转为大写，JSON 与 CSV 两种输入共用"""
+        return pd.Series(values, dtype=object).astype(str).str.strip().str.upper().to_numpy()
 
-        # 性别映射 M=1, F=0
-        df_input['GENDER'] = df_input['GENDER'].map({'M': 1, 'F': 0})
+    def numeric_column(values, col):
+        """将一列取值转为浮点数组；无法转换或不是有限数值时报告第几条记录"""
+        try:
+            column = np.asarray(values, dtype=np.float64)
+            if np.isfinite(column).all():
+                return column
+        except (TypeError, ValueError):
+            pass
+        for i, value in enumerate(values):
+            try:
+                valid = math.isfinite(float(value))
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                raise ValueError(f"第 {i + 1} 条记录字段 {HEADER_MAP[col]} 应为数字: {value!r}")
+
+    def preprocess_batch(columns, n):
+        """
+        将按训练列组织的原始取值转换为模型输入矩阵：
+        GENDER 映射 M=1/F=0，AGE 标准化，其余列减 1（与训练时一致）。
+        columns 为 {表头字段: 长度为 n 的取值序列}，缺失的列取默认值 0。
+        取值无法转换时抛出 ValueError，并指出第几条记录的哪个字段。
+        """
+        matrix = np.empty((n, len(TRAIN_COLUMNS)), dtype=np.float64)
+        for j, col in enumerate(TRAIN_COLUMNS):
+            values = columns.get(col)
+            if values is None:
+                matrix[:, j] = 0
+            elif col == 'GENDER':
+                gender = normalize_gender(values)
+                invalid = np.flatnonzero((gender != 'M') & (gender != 'F'))
+                if invalid.size:
+                    i = invalid[0]
+                    raise ValueError(f"第 {i + 1} 条记录字段 gender 取值应为 M 或 F: {values[i]!r}")
+                matrix[:, j] = gender == 'M'
+            else:
+                matrix[:, j] = numeric_column(values, col)
 
         # 除了GENDER和AGE的列都减1（训练时做的）
-        for col in df_input.columns:
-            if col not in ['GENDER', 'AGE']:
-                df_input[col] = df_input[col] - 1
+        matrix[:, 2:] -= 1
+        # 年龄标准化，与 scaler.transform 的计算相同
+        matrix[:, 1] = (matrix[:, 1] - scaler.mean_[0]) / scaler.scale_[0]
+        return matrix
 
-        # 年龄标准化
-        df_input['AGE'] = scaler.transform(df_input[['AGE']])
-        return df_input
+    def preprocess_records(records):
+        """前端字段字典列表 -> 模型输入，缺失项设默认值（例如 0）"""
+        return preprocess_batch({
+            COLUMN_MAP[key]: [record.get(key, 0) for record in records] for key in COLUMN_MAP
+        }, len(records))
+
+    def preprocess_input(data_dict):
+        return preprocess_records([data_dict])
+
+    def predict_batch(matrix):
+        """只调用一次 predict_proba，类别取概率最大者（与 model.predict 一致）"""
+        if compiled is not None and len(matrix) <= COMPILED_MAX_ROWS:
+            proba = compiled.predict_proba(matrix)
+        else:
+            # 模型按列名训练，带上列名以免 sklearn 告警
+            proba = model.predict_proba(pd.DataFrame(matrix, columns=TRAIN_COLUMNS, copy=False))
+        pred = model.classes_[np.argmax(proba, axis=1)]
+        return pred, proba[:, list(model.classes_).index(1)]
+
+    # 查找表依赖展开后的森林结构，模型不受支持时不启用
+    table = None
+    if (LOOKUP_TABLE if lookup_table is None else lookup_table) and compiled is not None:
+        table = PredictionTable(compiled, scaler, list(COLUMN_MAP), dtype=np.dtype(LOOKUP_TABLE_DTYPE))
+        logging.info("肺癌预测查找表：%s", table.info())
+
+    # 并发的单条预测在短窗口内合并为一批，只推理一次
+    window_ms = BATCH_WINDOW_MS if batch_window_ms is None else batch_window_ms
+    batcher = MicroBatcher(predict_batch, window=window_ms / 1000,
+                           max_rows=batch_max_rows or BATCH_MAX_ROWS) if window_ms > 0 else None
+
+    def format_result(pred, probability):
+        return {
+            'prediction': int(pred),
+            'prediction_label': '肺癌' if pred == 1 else '非肺癌',
+            'probability': float(probability)  # 返回患肺癌的概率
+        }
 
     @predict_bp.route('/predict', methods=['POST'])
     def predict():
@@ -61,23 +165,67 @@ def create_predict_bp(model_path='./models/best_lung_cancer_model.pkl', scaler_p
         if not data:
             return jsonify({'error': '无效输入'}), 400
         try:
-            print("输入数据（原始）：", data)
-
+            logging.debug("输入数据（原始）：%s", data)
+            hit = table.lookup(data) if table is not None else None
+            if hit is not None:
+                return jsonify(format_result(*hit))
             processed = preprocess_input(data)
-            print("预处理后数据：\n", processed)
+            pred, probability = batcher(processed) if batcher is not None else predict_batch(processed)
+            return jsonify(format_result(pred[0], probability[0]))
 
-            pred = model.predict(processed)
-            print("预测结果：", pred)
-
-            proba = model.predict_proba(processed)
-            print("预测概率：", proba)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
 
+    @predict_bp.route('/predict/metrics', methods=['GET'])
+    def predict_metrics():
+        """微批调度的队列深度与批次行数统计，以及查找表的大小"""
+        metrics = {'batching': batcher is not None, **(batcher.metrics() if batcher is not None else {})}
+        if table is not None:
+            metrics['lookup_table'] = table.info()
+        return jsonify(metrics)
+
+    def read_batch():
+        """读取批量请求：JSON 数组（或 {"patients": [...]}），或 CSV（请求体或上传的 file 字段）"""
+        upload = request.files.get('file')
+        if upload is not None or (request.mimetype or '').endswith('csv'):
+            raw = upload.read() if upload is not None else request.get_data()
+            df = pd.read_csv(io.BytesIO(raw), skipinitialspace=True)
+            df.columns = df.columns.str.strip()
+            df = df.rename(columns=COLUMN_MAP)
+            unknown = [col for col in df.columns if col not in TRAIN_COLUMNS and col != 'LUNG_CANCER']
+            if unknown:
+                raise ValueError(f"未知字段: {', '.join(unknown)}")
+            return len(df), lambda: preprocess_batch(
+                {col: df[col].to_numpy() for col in TRAIN_COLUMNS if col in df.columns}, len(df))
+
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('patients')
+        if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+            raise ValueError('请求体应为患者记录数组或 CSV')
+        return len(data), lambda: preprocess_records(data)
+
+    @predict_bp.route('/predict/batch', methods=['POST'])
+    def predict_batch_api():
+        """批量预测：整批预处理为一个矩阵，只调用一次 predict_proba"""
+        try:
+            n, preprocess = read_batch()
+            if n == 0:
+                return jsonify({'error': '无效输入'}), 400
+            if n > MAX_BATCH_SIZE:
+                return jsonify({'error': f'单次最多预测 {MAX_BATCH_SIZE} 条记录'}), 400
+            # 取值的转换与校验也在这里，非法取值返回 400 并指出记录序号
+            matrix = preprocess()
+        except (ValueError, pd.errors.ParserError) as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            pred, probability = predict_batch(matrix)
             return jsonify({
-                'prediction': int(pred[0]),
-                'prediction_label': '肺癌' if pred[0] == 1 else '非肺癌',
-                'probability': float(proba[0, 1])  # 返回患肺癌的概率
+                'count': n,
+                'results': [format_result(p, q) for p, q in zip(pred.tolist(), probability.tolist())]
             })
-
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
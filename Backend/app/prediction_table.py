@@ -0,0 +1,74 @@
+"""
+肺癌预测的预计算查找表：性别与 13 项症状都只有两种取值，年龄为有限范围内的整数，
+加载模型时一次算出整个输入空间（2^14 × 年龄数）的概率，单条预测只需一次数组查找。
+不在表覆盖范围内的输入（性别未知、症状取值不是 1/2、年龄不是范围内整数等）返回 None，由调用方走模型推理。
+"""
+import time
+
+import numpy as np
+
+# 表覆盖的年龄范围（含两端），训练数据中的年龄为 21–87
+TABLE_AGE_MIN = 18
+TABLE_AGE_MAX = 90
+
+# 性别 1 位 + 13 项症状各 1 位
+FLAG_BITS = 14
+
+
+class PredictionTable:
+    """
+    下标 = (年龄 - age_min) << 14 | 症状位 << 1 | 性别位，症状位按训练列顺序从低到高排列。
+    probability 为正类概率（float32 或 float16），label 为按全精度概率取的类别（与 model.predict 一致）。
+    """
+
+    def __init__(self, compiled, scaler, fields, age_min=TABLE_AGE_MIN, age_max=TABLE_AGE_MAX, dtype=np.float32):
+        """fields 为前端字段名，按训练列顺序：性别、年龄、13 项症状"""
+        start = time.perf_counter()
+        self.gender_field, self.age_field, *self.flag_fields = fields
+        self.age_min, self.age_max = age_min, age_max
+        self.classes = compiled.classes_
+
+        ages = np.arange(age_min, age_max + 1, dtype=np.float64)
+        # 与 predict_bp 预处理相同：性别 F=0/M=1，症状 1/2 减 1，年龄标准化
+        axes = [[0, 1], (ages - scaler.mean_[0]) / scaler.scale_[0]] + [[0, 1]] * len(self.flag_fields)
+        proba = compiled.predict_proba_grid(axes)
+        # 维度调整为 (年龄, 最后一项症状, ..., 第一项症状, 性别, 类别)，展平后即为上面的下标
+        order = [1] + list(range(len(axes) - 1, 1, -1)) + [0, len(axes)]
+        proba = proba.transpose(order).reshape(len(ages) << FLAG_BITS, 2)
+        self.probability = proba[:, 1].astype(dtype)
+        self.label = proba[:, 1] > proba[:, 0]
+        self.build_seconds = time.perf_counter() - start
+
+    def index(self, record):
+        """患者记录 -> 表下标，不在表覆盖范围内时返回 None"""
+        if not isinstance(record, dict):
+            return None
+        gender = record.get(self.gender_field)
+        if gender not in ('M', 'F'):
+            return None
+        bits = int(gender == 'M')
+        for i, field in enumerate(self.flag_fields, 1):
+            value = record.get(field)
+            if not isinstance(value, (int, float)) or value not in (1, 2):
+                return None
+            bits |= int(value - 1) << i
+        age = record.get(self.age_field)
+        if not isinstance(age, (int, float)) or not float(age).is_integer() or not self.age_min <= age <= self.age_max:
+            return None
+        return (int(age) - self.age_min) << FLAG_BITS | bits
+
+    def lookup(self, record):
+        """返回 (类别, 正类概率)，不在表覆盖范围内时返回 None"""
+        i = self.index(record)
+        if i is None:
+            return None
+        return self.classes[int(self.label[i])], self.probability[i]
+
+    def info(self):
+        return {
+            'entries': len(self.probability),
+            'age_range': [self.age_min, self.age_max],
+            'dtype': str(self.probability.dtype),
+            'bytes': self.probability.nbytes + self.label.nbytes,
+            'build_seconds': round(self.build_seconds, 3),
+        }
@@ -0,0 +1,78 @@
+"""
+保险分析结果的磁盘存储：每个结果序列化为一个 JSON 文件，按数据集内容哈希与查询参数命名，
+多个 worker 进程和重启后的进程都可直接读取；insurance.csv 内容变化后旧结果自动失效并清理。
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from analysis.data_loader import get_dataset_version
+
+STORE_SUFFIX = '.results'
+
+# 每个数据集版本最多保留的结果文件数，超出时删除最早写入的
+MAX_STORED_RESULTS = 256
+
+# 结果格式版本，返回格式变化时递增，旧格式的文件不再命中
+STORE_FORMAT = 3
+
+
+def store_dir(csv_path):
+    """结果目录，与 CSV 同目录，例如 data/insurance.results/"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + STORE_SUFFIX)
+
+
+def _result_path(csv_path, version, name, kwargs):
+    key = hashlib.sha1(json.dumps([STORE_FORMAT, name, kwargs], sort_keys=True).encode('utf-8')).hexdigest()
+    # 文件名以数据集版本开头，便于清理旧版本
+    return store_dir(csv_path) / f'{version}-{key}.json'
+
+
+def load_result(csv_path, name, kwargs):
+    """读取已存储的结果，返回 (是否命中, 结果)"""
+    version = get_dataset_version(csv_path)
+    if version is None:
+        return False, None
+    try:
+        with open(_result_path(csv_path, version, name, kwargs), 'r', encoding='utf-8') as f:
+            return True, json.load(f)
+    except (OSError, ValueError):
+        return False, None
+
+
+def _prune(directory, version):
+    """删除其他数据集版本的结果，并把当前版本的结果数控制在上限以内"""
+    current = []
+    for path in directory.glob('*.json'):
+        if path.name.startswith(version + '-'):
+            current.append(path)
+        else:
+            path.unlink(missing_ok=True)
+    if len(current) > MAX_STORED_RESULTS:
+        current.sort(key=lambda p: p.stat().st_mtime_ns)
+        for path in current[:len(current) - MAX_STORED_RESULTS]:
+            path.unlink(missing_ok=True)
+
+
+def store_result(csv_path, name, kwargs, result, version=None):
+    """
+    写入结果（先写临时文件再替换，其他进程不会读到写了一半的文件）。
+    version 为计算开始前的数据集版本，计算期间数据变化时不写入。
+    """
+    current = get_dataset_version(csv_path)
+    if current is None or (version is not None and version != current):
+        return
+    directory = store_dir(csv_path)
+    try:
+        directory.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, _result_path(csv_path, current, name, kwargs))
+        _prune(directory, current)
+    except OSError as e:
+        # 目录不可写时只是失去磁盘缓存，不影响结果
+        print(f"写入分析结果缓存失败: {e}")
@@ -1,5 +1,19 @@
 from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql import Window
+from pyspark.sql.types import DoubleType, IntegerType, LongType, StringType, StructField, StructType
+import json
+import math
+import shutil
 import sys, os
+import tempfile
+import threading
+from pathlib import Path
+
+from utils.columnar_cache import META_FILE, ROW_COLUMN
+from . import analysis_engine
+from .analysis_engine import (CORRELATION_COLUMNS, DEFAULT_AGE_BINS, DEFAULT_RELATIVE_ERROR, MAX_OUTLIERS,
+                              PARTITION_BY, dataset_version, even_quota, partition_count, partition_filters)
 
 python_path = sys.executable
 os.environ['PYSPARK_PYTHON'] = python_path
@@ -7,78 +21,453 @@ os.environ['PYSPARK_DRIVER_PYTHON'] = python_path
 
 # 全局变量存储 SparkSession 单例
 spark = None
+_spark_lock = threading.Lock()
+
+# 显式声明的表结构，不再由数据推断；ROW_COLUMN 的大小顺序即 CSV 中的行序
+INSURANCE_SPARK_SCHEMA = StructType([
+    StructField('age', IntegerType()),
+    StructField('sex', StringType()),
+    StructField('bmi', DoubleType()),
+    StructField('children', IntegerType()),
+    StructField('smoker', StringType()),
+    StructField('region', StringType()),
+    StructField('charges', DoubleType()),
+    StructField(ROW_COLUMN, LongType()),
+])
+
+# CSV 本身不含行号列，读取时按此结构声明类型
+INSURANCE_CSV_SCHEMA = StructType([field for field in INSURANCE_SPARK_SCHEMA.fields if field.name != ROW_COLUMN])
+
+# Spark 引擎读取的分区 Parquet 数据：与 CSV 同目录，例如 data/insurance.spark/
+SPARK_DATASET_SUFFIX = '.spark'
+SPARK_DATASET_FORMAT = 1
+
+
+def spark_dataset_dir(csv_path):
+    """Spark 引擎的分区 Parquet 数据目录"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + SPARK_DATASET_SUFFIX)
+
+
+def _read_dataset_meta(directory):
+    try:
+        with open(directory / META_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(meta, version):
+    return (meta is not None and meta.get('format') == SPARK_DATASET_FORMAT and meta.get('version') == version
+            and meta.get('partition_by') == PARTITION_BY)
+
+
+def build_spark_dataset(session, csv_path, version):
+    """
+    由 Spark 直接读取 CSV（按声明的类型解析，不做推断）并写出按 region/smoker 分区的 Parquet 数据，
+    数据不经过 driver。ROW_COLUMN 取 monotonically_increasing_id：CSV 各分片按文件偏移编号，
+    数值的先后即 CSV 中的行序。分区内按年龄排序写出，Parquet 行组的年龄最小/最大值可跳过不相关的行组。
+    先写入临时目录再替换，其他进程不会读到写了一半的数据。
+    """
+    target = spark_dataset_dir(csv_path)
+    tmp_dir = Path(tempfile.mkdtemp(prefix='.' + target.name + '.', dir=target.parent))
+    try:
+        session.read.csv(str(csv_path), header=True, schema=INSURANCE_CSV_SCHEMA) \
+            .withColumn(ROW_COLUMN, F.monotonically_increasing_id()) \
+            .sortWithinPartitions(*PARTITION_BY, 'age') \
+            .write.partitionBy(*PARTITION_BY).mode('overwrite').parquet(str(tmp_dir / 'data'))
+        # 行数取自 Parquet 元数据，无需再扫描数据
+        rows = session.read.parquet(str(tmp_dir / 'data')).count()
+        meta = {'format': SPARK_DATASET_FORMAT, 'version': version, 'partition_by': PARTITION_BY, 'rows': rows}
+        with open(tmp_dir / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except OSError:
+        # 并发的其他进程已写好目标目录时沿用其结果
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return _read_dataset_meta(target)
+
+
+def _read_dataset(session, filters=None):
+    """
+    读取分区 Parquet 数据。带 region/smoker 条件时只把匹配的分区目录交给 Spark，其余文件不会被打开；
+    年龄条件作为 Parquet 谓词下推，按行组统计跳过不满足的行组。
+    """
+    directory = spark_dataset_dir(session.csv_path) / 'data'
+    reader = session.read.schema(INSURANCE_SPARK_SCHEMA).option('basePath', str(directory))
+    pruned = partition_filters(filters)
+    if pruned:
+        # 列出全部分区目录后按目录名中的取值精确比较，筛选取值不会拼进路径通配符
+        paths = [str(path) for path in sorted(directory.glob('/'.join(f'{column}=*' for column in PARTITION_BY)))
+                 if all(pruned.get(column, value) == value
+                        for column, value in (part.split('=', 1) for part in path.relative_to(directory).parts))]
+        if not paths:
+            return session.createDataFrame([], INSURANCE_SPARK_SCHEMA)
+        df = reader.parquet(*paths)
+    else:
+        df = reader.parquet(str(directory))
+    if filters is not None:
+        if filters.age_min is not None:
+            df = df.where(F.col('age') >= filters.age_min)
+        if filters.age_max is not None:
+            df = df.where(F.col('age') <= filters.age_max)
+    return df.select(*INSURANCE_SPARK_SCHEMA.fieldNames())
 
 
 def get_spark_session():
+    """获取 SparkSession 单例；insurance.csv 内容变化后重新生成分区 Parquet 数据并重新缓存"""
     global spark
-    if spark is None:
-        # 构建项目根目录路径（即 Backend/）
-        BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        csv_path = os.path.join(BASE_DIR, 'data', 'insurance.csv')  # Backend/data/insurance.csv
-
-        spark = SparkSession.builder \
-            .appName("Insurance Visual Data RDD") \
-            .master("local[*]") \
-            .getOrCreate()
+    version = dataset_version()
+    if spark is not None and spark.df_version == version:
+        return spark
+    with _spark_lock:
+        if spark is None:
+            spark = SparkSession.builder \
+                .appName("Insurance Visual Data") \
+                .master("local[*]") \
+                .config("spark.sql.execution.arrow.pyspark.enabled", "true") \
+                .getOrCreate()
+            spark.df = None
+            spark.df_version = None
+        if spark.df_version == version:
+            return spark
 
-        # 读取 CSV，缓存 DataFrame 以提升后续性能
-        spark.df = spark.read.csv(csv_path, header=True, inferSchema=True).cache()
+        # 运行时读取路径（基准测试会替换 INSURANCE_CSV）
+        csv_path = analysis_engine.INSURANCE_CSV
+        meta = _read_dataset_meta(spark_dataset_dir(csv_path))
+        if not _is_fresh(meta, version):
+            meta = build_spark_dataset(spark, csv_path, version)
+        spark.csv_path = csv_path
+        # 分区数按行数计算，避免默认的 200 个 shuffle 分区在小数据上空转
+        spark.conf.set("spark.sql.shuffle.partitions", str(partition_count(meta['rows'])))
 
-        # 转为 RDD
-        spark.rdd = spark.df.rdd
+        if spark.df is not None:
+            spark.df.unpersist()
+        # 无筛选条件的查询使用缓存的全表；带条件的查询直接读取匹配的分区，不经过缓存
+        spark.df = _read_dataset(spark).cache()
+        spark.df_version = version
     return spark
 
 
-def get_boxplot_data():
-    spark = get_spark_session()
-    result = spark.rdd.map(lambda row: (row['smoker'], row['charges'])) \
-        .filter(lambda x: None not in x) \
-        .groupByKey() \
-        .mapValues(list) \
-        .collect()
-    return {k: list(v) for k, v in result}
+def _frame(filters=None):
+    """无筛选条件时返回缓存的全表，否则只读取匹配的分区并下推年龄条件"""
+    session = get_spark_session()
+    if filters is None:
+        return session.df
+    return _read_dataset(session, filters)
 
 
-def get_scatter_bmi_charges():
-    spark = get_spark_session()
-    result = spark.rdd.map(lambda row: (row['bmi'], row['charges'])) \
-        .filter(lambda x: None not in x) \
-        .collect()
-    return [list(x) for x in result]
+def _collect_rows(df):
+    """
+    经 Arrow 将结果转为 pandas 再转为 Python 原生类型的行列表，避免逐行 pickle。
+    带有 ROW_COLUMN 时按 CSV 中的行序返回。
+    """
+    if ROW_COLUMN in df.columns:
+        df = df.orderBy(ROW_COLUMN).drop(ROW_COLUMN)
+    pdf = df.toPandas()
+    return [list(row) for row in pdf.itertuples(index=False, name=None)]
 
 
-def get_age_histogram():
-    spark = get_spark_session()
-    result = spark.rdd.map(lambda row: row['age']) \
-        .filter(lambda x: x is not None) \
-        .collect()
-    return result
+def get_boxplot_data(raw=False, relative_error=DEFAULT_RELATIVE_ERROR, filters=None):
+    """
+    按吸烟分组的医保费用箱线图统计：四分位数、须线（1.5 倍四分位距内的最值）、离群点。
+    离群点只在超出界限的行上按距离开窗排名，每组取最远的 MAX_OUTLIERS 个再聚合，不会把整组离群点收集到一行。
+    raw=True 时返回原来的 {smoker: [charges]} 格式。
+    """
+    df = _frame(filters).where(F.col('smoker').isNotNull() & F.col('charges').isNotNull()) \
+        .select('smoker', 'charges', ROW_COLUMN)
+    if raw:
+        # 按原始行号排序后取出费用，保持 CSV 中的顺序
+        result = df.groupBy('smoker') \
+            .agg(F.sort_array(F.collect_list(F.struct(ROW_COLUMN, 'charges'))).getField('charges').alias('charges')) \
+            .collect()
+        return {row['smoker']: list(row['charges']) for row in result}
 
+    # 各组分位数一次聚合算出
+    accuracy = int(1 / relative_error) if relative_error > 0 else 2 ** 31 - 1
+    stats = df.groupBy('smoker').agg(
+        F.count('charges').alias('count'),
+        F.avg('charges').alias('mean'),
+        F.min('charges').alias('min'),
+        F.max('charges').alias('max'),
+        F.expr(f"percentile_approx(charges, array(0.25, 0.5, 0.75), {accuracy})").alias('q')
+    )
+    q1, q3 = F.col('q')[0], F.col('q')[2]
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    charges = F.col('charges')
+    inside = (charges >= low) & (charges <= high)
 
-def get_region_avg_charges():
-    spark = get_spark_session()
-    result = spark.rdd.map(lambda row: (row['region'], (row['charges'], 1))) \
-        .filter(lambda x: x[0] is not None and x[1][0] is not None) \
-        .reduceByKey(lambda a, b: (a[0] + b[0], a[1] + b[1])) \
-        .mapValues(lambda x: round(x[0] / x[1], 2)) \
-        .collect()
-    return dict(result)
+    # 再按四分位距筛出须线与离群点
+    df = df.join(F.broadcast(stats), 'smoker')
+    result = df.groupBy('smoker').agg(
+        F.first('count').alias('count'),
+        F.first('mean').alias('mean'),
+        F.first('min').alias('min'),
+        F.first('max').alias('max'),
+        F.first('q').alias('q'),
+        F.min(F.when(inside, charges)).alias('lower_whisker'),
+        F.max(F.when(inside, charges)).alias('upper_whisker'),
+        F.sum(F.when(inside, 0).otherwise(1)).alias('outlier_count')
+    ).collect()
 
+    # 离群点按超出界限的距离从远到近排名（距离相同时按行号），每组只聚合前 MAX_OUTLIERS 个
+    by_distance = Window.partitionBy('smoker').orderBy(F.greatest(low - charges, charges - high).desc(), ROW_COLUMN)
+    extreme = df.where(~inside).withColumn('_rank', F.row_number().over(by_distance)) \
+        .where(F.col('_rank') <= MAX_OUTLIERS) \
+        .groupBy('smoker').agg(F.sort_array(F.collect_list('charges')).alias('outliers')).collect()
+    outliers = {row['smoker']: list(row['outliers']) for row in extreme}
 
-def get_scatter_age_charges_smoker():
-    spark = get_spark_session()
-    result = spark.rdd.map(lambda row: (row['age'], row['charges'], row['smoker'])) \
-        .filter(lambda x: None not in x) \
-        .collect()
-    return [list(x) for x in result]
+    return {
+        row['smoker']: {
+            "count": row['count'],
+            "mean": row['mean'],
+            "min": row['min'],
+            "max": row['max'],
+            "q1": row['q'][0],
+            "median": row['q'][1],
+            "q3": row['q'][2],
+            "lowerWhisker": row['lower_whisker'],
+            "upperWhisker": row['upper_whisker'],
+            "outlierCount": row['outlier_count'],
+            "outliersTruncated": row['outlier_count'] > MAX_OUTLIERS,
+            "outliers": outliers.get(row['smoker'], [])
+        }
+        for row in result
+    }
+
+
+def _bin_index(col, low, high, bins):
+    """把 [low, high] 均分为 bins 段，返回所在段号（最大值归入最后一段）"""
+    width = (high - low) / bins if high > low else 1.0
+    return F.least(F.floor((F.col(col) - F.lit(low)) / F.lit(width)).cast('int'), F.lit(bins - 1))
+
+
+def _grid_bins(df, x, y, bins, group=None):
+    """
+    在 Spark 中把 (x, y) 平面均分为 bins × bins 个网格并计数，返回大小与行数无关的结果。
+    cells 中每项为 [x 网格号, y 网格号, (分组值,) 点数]。
+    """
+    x_min, x_max, y_min, y_max = df.agg(F.min(x), F.max(x), F.min(y), F.max(y)).first()
+    if x_min is None:
+        return {"mode": "bins", "bins": bins, "xRange": None, "yRange": None, "cells": []}
+
+    keys = [_bin_index(x, x_min, x_max, bins).alias('x_bin'), _bin_index(y, y_min, y_max, bins).alias('y_bin')]
+    if group is not None:
+        keys.append(F.col(group))
+    result = df.groupBy(*keys).count().collect()
+    return {
+        "mode": "bins",
+        "bins": bins,
+        "xRange": [x_min, x_max],
+        "yRange": [y_min, y_max],
+        "cells": [[row['x_bin'], row['y_bin']] + ([row[group]] if group is not None else []) + [row['count']]
+                  for row in result]
+    }
 
 
-def get_correlation_data():
-    spark = get_spark_session()
-    result = spark.rdd.map(lambda row: (row['age'], row['bmi'], row['children'], row['charges'])) \
-        .filter(lambda x: None not in x) \
+def _sample_preserving_outliers(df, max_points, value='charges', group=None, seed=42):
+    """
+    在 Spark 中抽样到最多 max_points 行，返回 (抽样后的 DataFrame, 总行数, 离群点数)：
+    各分组内按 Tukey 规则（1.5 倍四分位距）判定的离群点优先保留，
+    其余点在各分组内按相同比例随机抽取，因此每组所占比例与原数据一致。
+    离群点本身超过 max_points 时不再抽取其余点，离群点按分组等比例分配名额，
+    组内在随机候选中按取值等间隔抽取，不对全部离群点排序。结果带有 _outlier 列，供统计返回的离群点数。
+    """
+    group_col = F.col(group) if group is not None else F.lit('all')
+    df = df.withColumn('_group', group_col)
+    quartiles = df.groupBy('_group').agg(
+        F.expr(f"percentile_approx({value}, array(0.25, 0.75), 10000)").alias('_q')
+    )
+    q1, q3 = F.col('_q')[0], F.col('_q')[1]
+    iqr = q3 - q1
+    df = df.join(F.broadcast(quartiles), '_group') \
+        .withColumn('_outlier', (F.col(value) < q1 - 1.5 * iqr) | (F.col(value) > q3 + 1.5 * iqr))
+
+    # 各组行数与离群点数一次聚合得到
+    counts = df.groupBy('_group').agg(F.count(F.lit(1)).alias('rows'),
+                                      F.sum(F.col('_outlier').cast('long')).alias('outliers')).collect()
+    total = sum(row['rows'] for row in counts)
+    outlier_counts = {row['_group']: row['outliers'] for row in counts}
+    n_outliers = sum(outlier_counts.values())
+
+    columns = [c for c in df.columns if c not in ('_group', '_q')]
+    if total <= max_points:
+        return df.select(*columns), total, n_outliers
+
+    outliers = df.where(F.col('_outlier'))
+    if n_outliers > max_points:
+        # 先按约两倍名额随机取候选，再在组内按取值排序等间隔选出恰好 quota 个；
+        # 候选只有约 2 × max_points 行，组内排序的代价与数据量无关
+        quota = even_quota(outlier_counts, max_points)
+        fractions = {g: min(1.0, (2 * quota[g] + 10) / count) if count else 0.0
+                     for g, count in outlier_counts.items()}
+        candidates = outliers.sampleBy('_group', fractions=fractions, seed=seed)
+        by_group = Window.partitionBy('_group')
+        rank = F.row_number().over(by_group.orderBy(value, ROW_COLUMN)) - 1
+        size = F.count(F.lit(1)).over(by_group)
+        k = F.create_map(*[F.lit(v) for item in quota.items() for v in item])[F.col('_group')]
+        # 组内第 rank 个（从 0 计）候选在 floor(rank·k/size) 变化处入选
+        sample = candidates.withColumn('_keep', F.floor(rank * k / size) != F.floor((rank - 1) * k / size)) \
+            .where(F.col('_keep'))
+        return sample.select(*columns), total, n_outliers
+
+    inliers = df.where(~F.col('_outlier'))
+    fraction = min(1.0, (max_points - n_outliers) / max(total - n_outliers, 1))
+    sample = inliers.sampleBy('_group', fractions={g: fraction for g in outlier_counts}, seed=seed) \
+        .limit(max_points - n_outliers)
+    return outliers.select(*columns).unionByName(sample.select(*columns)), total, n_outliers
+
+
+def _sample_payload(df, max_points, group=None):
+    """抽样模式的返回：points 为与默认格式相同的点，另附总行数、离群点数与返回的离群点数"""
+    sample, total, n_outliers = _sample_preserving_outliers(df, max_points, group=group)
+    pdf = sample.orderBy(ROW_COLUMN).drop(ROW_COLUMN).toPandas()
+    sampled_outliers = int(pdf.pop('_outlier').sum())
+    return {
+        "mode": "sample",
+        "maxPoints": max_points,
+        "count": total,
+        "outlierCount": n_outliers,
+        "sampledOutliers": sampled_outliers,
+        "points": [list(row) for row in pdf.itertuples(index=False, name=None)]
+    }
+
+
+def get_scatter_bmi_charges(bins=None, max_points=None, filters=None):
+    """
+    默认返回全部 [bmi, charges] 点；
+    bins 指定时返回网格计数，max_points 指定时返回保留离群点的抽样（两者互斥，由 analysis_engine 校验）：
+    points 为与默认格式相同的点，count / outlierCount / sampledOutliers 为总行数、离群点数与返回的离群点数。
+    """
+    df = _frame(filters).select('bmi', 'charges', ROW_COLUMN).dropna()
+    if bins:
+        return _grid_bins(df, 'bmi', 'charges', bins)
+    if max_points:
+        return _sample_payload(df, max_points)
+    return _collect_rows(df)
+
+
+def get_age_histogram(raw=False, bins=None, filters=None):
+    """
+    年龄直方图：在 Spark 中按等宽分组计数，edges 为 bins + 1 个分组边界。
+    raw=True 时返回原来的全部年龄列表。
+    """
+    df = _frame(filters).select('age', ROW_COLUMN).dropna()
+    if raw:
+        return df.orderBy(ROW_COLUMN).select('age').toPandas()['age'].tolist()
+
+    bins = bins or DEFAULT_AGE_BINS
+    count, mean, age_min, age_max = df.agg(F.count('age'), F.avg('age'), F.min('age'), F.max('age')).first()
+    if not count:
+        return {"count": 0, "mean": None, "min": None, "max": None, "edges": [], "counts": []}
+
+    counts = [0] * bins
+    for row in df.groupBy(_bin_index('age', age_min, age_max, bins).alias('bin')).count().collect():
+        counts[row['bin']] = row['count']
+    width = (age_max - age_min) / bins if age_max > age_min else 1.0
+    return {
+        "count": count,
+        "mean": mean,
+        "min": age_min,
+        "max": age_max,
+        "edges": [age_min + width * i for i in range(bins + 1)],
+        "counts": counts
+    }
+
+
+def get_region_avg_charges(filters=None):
+    result = _frame(filters).where(F.col('region').isNotNull() & F.col('charges').isNotNull()) \
+        .groupBy('region') \
+        .agg(F.avg('charges').alias('avg_charges')) \
         .collect()
-    return [list(x) for x in result]
+    # 与原实现一致，使用 Python 的 round 保留两位小数
+    return {row['region']: round(row['avg_charges'], 2) for row in result}
+
+
+def get_scatter_age_charges_smoker(bins=None, max_points=None, filters=None):
+    """
+    默认返回全部 [age, charges, smoker] 点；
+    bins 指定时按吸烟分组返回网格计数，max_points 指定时在各吸烟分组内保留离群点并等比例抽样（两者互斥）。
+    """
+    df = _frame(filters).select('age', 'charges', 'smoker', ROW_COLUMN).dropna()
+    if bins:
+        return _grid_bins(df, 'age', 'charges', bins, group='smoker')
+    if max_points:
+        return _sample_payload(df, max_points, group='smoker')
+    return _collect_rows(df)
+
+
+def _average_ranks(df, column):
+    """
+    返回 (列的每个不同取值 -> 平均秩（从 1 计，并列取平均）的表, 其依赖的已缓存计数表)，
+    计数表用完后由调用方 unpersist。
+    平均秩 = 小于该值的行数 + (该值的行数 + 1) / 2。先按不同取值计数，再按近似分位点把取值切成
+    与 shuffle 分区数相同的段：各段行数在驱动端累加为段起始偏移，段内按取值求累计行数，
+    窗口按段分区，不再像 Window.orderBy 那样把所有行排到同一个分区。
+    """
+    counts = df.groupBy(column).agg(F.count(F.lit(1)).alias('_n'))
+    segments = int(df.sparkSession.conf.get('spark.sql.shuffle.partitions'))
+    cuts = sorted(set(counts.approxQuantile(column, [i / segments for i in range(1, segments)],
+                                            DEFAULT_RELATIVE_ERROR)))
+    segment = sum((F.col(column) > cut).cast('int') for cut in cuts) if cuts else F.lit(0)
+    counts = counts.withColumn('_segment', segment).cache()
+
+    offsets, start = {}, 0
+    for row in counts.groupBy('_segment').agg(F.sum('_n').alias('rows')).orderBy('_segment').collect():
+        offsets[row['_segment']] = start
+        start += row['rows']
+    # 没有数据时 create_map() 没有键值类型，不能按段取值
+    offset = F.create_map(*[F.lit(v) for item in offsets.items() for v in item])[F.col('_segment')] \
+        if offsets else F.lit(0)
+    before = F.sum('_n').over(Window.partitionBy('_segment').orderBy(column)) - F.col('_n')
+    return counts.select(column, (offset + before + (F.col('_n') + 1) / 2).alias('_rank')), counts
+
+
+def get_correlation_data(raw=False, columns=None, spearman=False, filters=None):
+    """
+    数值列的相关系数矩阵：所有列对的 F.corr 在同一次聚合中计算，只扫描一遍数据；
+    spearman=True 时先按各列不同取值算出平均秩表（见 _average_ranks），再按取值连接回数据行。
+    raw=True 时返回原来的 [age, bmi, children, charges] 行列表。
+    """
+    columns = columns or CORRELATION_COLUMNS
+    df = _frame(filters).select(*columns, ROW_COLUMN).dropna()
+    if raw:
+        return _collect_rows(df)
+
+    k = len(columns)
+    pairs = [(i, j) for i in range(k) for j in range(i + 1, k)]
+    aggregations = [F.count(F.lit(1)).alias('count')]
+    aggregations += [F.corr(columns[i], columns[j]).alias(f'p_{i}_{j}') for i, j in pairs]
+    # 对角线：方差为 0 时相关系数无定义
+    aggregations += [F.stddev_pop(c).alias(f'sd_{i}') for i, c in enumerate(columns)]
+    cached = []
+    if spearman:
+        base = df
+        for i, c in enumerate(columns):
+            ranks, counts = _average_ranks(base, c)
+            cached.append(counts)
+            df = df.join(ranks.withColumnRenamed('_rank', f'_rank_{i}'), on=c)
+        aggregations += [F.corr(f'_rank_{i}', f'_rank_{j}').alias(f's_{i}_{j}') for i, j in pairs]
+    row = df.agg(*aggregations).first()
+    for counts in cached:
+        counts.unpersist()
+
+    def matrix(prefix):
+        values = [[None] * k for _ in range(k)]
+        for i in range(k):
+            values[i][i] = 1.0 if row[f'sd_{i}'] else None
+        for i, j in pairs:
+            value = row[f'{prefix}_{i}_{j}']
+            values[i][j] = values[j][i] = None if value is None or math.isnan(value) else value
+        return values
+
+    count = row['count']
+    result = {"columns": columns, "count": count, "pearson": matrix('p') if count > 1 else None}
+    if spearman:
+        result["spearman"] = matrix('s') if count > 1 else None
+    return result
 
 
 def stop_spark():
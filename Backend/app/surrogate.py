@@ -0,0 +1,125 @@
+"""
+肺癌模型的蒸馏替代模型：用校准后的随机森林（教师模型）给出的概率作为软标签，
+训练一个 60 棵树、每棵至多 63 个叶节点的直方图梯度提升模型（约 0.4 MB，原模型约 3.3 MB），
+并在留出集与随机输入上评估与教师模型的一致程度。
+保真度报告与模型一同保存，达到门槛时 predict_bp 可改用替代模型提供预测。
+"""
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.metrics import roc_auc_score
+
+from .prediction_table import TABLE_AGE_MAX, TABLE_AGE_MIN
+
+SURROGATE_FILE = 'lung_cancer_surrogate.pkl'
+REPORT_FILE = 'lung_cancer_surrogate_report.json'
+
+# 保真度门槛：留出集上类别一致率、AUC 相对教师模型的最大下降、概率的最大偏差，以及随机输入上的类别一致率。
+# 实测（6 个蒸馏抽样种子）留出集最大偏差 0.026–0.046、均值约 0.01，随机输入一致率 0.987–0.989。
+# 随机输入的最大偏差（约 0.25–0.33，99 分位约 0.12）只记录不设门槛：远离训练数据的组合上
+# 教师模型本身只是随机森林的外推，紧凑模型无法逐点复现，只要求类别一致。
+MIN_AGREEMENT = 0.98
+MAX_AUC_DROP = 0.02
+MAX_DEVIATION = 0.05
+MIN_RANDOM_AGREEMENT = 0.98
+
+
+def _random_inputs(columns, scaler, n, rng):
+    """输入空间内均匀抽样：二值特征取 0/1，年龄取表覆盖范围内的整数并标准化"""
+    X = rng.integers(0, 2, (n, len(columns))).astype(np.float64)
+    age = columns.index('AGE')
+    X[:, age] = (rng.integers(TABLE_AGE_MIN, TABLE_AGE_MAX + 1, n) - scaler.mean_[0]) / scaler.scale_[0]
+    return pd.DataFrame(X, columns=columns)
+
+
+def distillation_set(X_train, scaler, repeat=50, n_near=200_000, n_random=10_000, seed=42):
+    """
+    蒸馏用的输入：训练样本（重复 repeat 次加大权重）、在训练样本附近随机翻转少量二值特征并微调年龄的样本，
+    以及输入空间内的均匀抽样，使替代模型在真实数据附近和整个输入空间上都贴近教师模型。
+    """
+    rng = np.random.default_rng(seed)
+    columns = list(X_train.columns)
+    age = columns.index('AGE')
+    near = X_train.to_numpy(dtype=np.float64)[rng.integers(0, len(X_train), n_near)]
+    flip = rng.random(near.shape) < 0.08
+    flip[:, age] = False
+    near[flip] = 1 - near[flip]
+    near[:, age] += rng.integers(-3, 4, n_near) / scaler.scale_[0]
+    return pd.concat([X_train.astype(np.float64)] * repeat
+                     + [pd.DataFrame(near, columns=columns), _random_inputs(columns, scaler, n_random, rng)],
+                     ignore_index=True)
+
+
+def distill(teacher, X_fit):
+    """
+    以教师模型的正类概率为软标签训练替代模型：每个样本拆成标签 1（权重 p）和标签 0（权重 1 - p）两条，
+    对数损失即与教师概率的交叉熵
+    """
+    p = teacher.predict_proba(X_fit)[:, 1]
+    surrogate = HistGradientBoostingClassifier(max_iter=60, max_leaf_nodes=63, learning_rate=0.3,
+                                               early_stopping=False, random_state=42)
+    surrogate.fit(pd.concat([X_fit, X_fit], ignore_index=True),
+                  np.r_[np.ones(len(X_fit), dtype=int), np.zeros(len(X_fit), dtype=int)],
+                  sample_weight=np.r_[p, 1 - p])
+    return surrogate
+
+
+def _agreement(teacher_proba, surrogate_proba):
+    deviation = np.abs(teacher_proba - surrogate_proba)
+    return {
+        "agreement": float(np.mean((teacher_proba > 0.5) == (surrogate_proba > 0.5))),
+        "max_deviation": float(deviation.max()),
+        "mean_deviation": float(deviation.mean()),
+    }
+
+
+def fidelity_report(teacher, surrogate, X_test, y_test, scaler, n_random=20_000, seed=0):
+    """留出集上的 AUC、类别一致率与概率偏差，以及输入空间随机抽样上的一致程度；passed 为是否达到门槛"""
+    teacher_proba = teacher.predict_proba(X_test)[:, 1]
+    surrogate_proba = surrogate.predict_proba(X_test)[:, 1]
+    X_random = _random_inputs(list(X_test.columns), scaler, n_random, np.random.default_rng(seed))
+    held_out = {
+        "count": len(X_test),
+        "teacher_auc": float(roc_auc_score(y_test, teacher_proba)),
+        "surrogate_auc": float(roc_auc_score(y_test, surrogate_proba)),
+        **_agreement(teacher_proba, surrogate_proba),
+    }
+    random_inputs = {
+        "count": n_random,
+        **_agreement(teacher.predict_proba(X_random)[:, 1], surrogate.predict_proba(X_random)[:, 1]),
+    }
+    report = {
+        "held_out": held_out,
+        "random_inputs": random_inputs,
+        "gate": {"min_agreement": MIN_AGREEMENT, "max_auc_drop": MAX_AUC_DROP, "max_deviation": MAX_DEVIATION,
+                 "min_random_agreement": MIN_RANDOM_AGREEMENT},
+    }
+    report["passed"] = (held_out["agreement"] >= MIN_AGREEMENT
+                        and held_out["teacher_auc"] - held_out["surrogate_auc"] <= MAX_AUC_DROP
+                        and held_out["max_deviation"] <= MAX_DEVIATION
+                        and random_inputs["agreement"] >= MIN_RANDOM_AGREEMENT)
+    return report
+
+
+def save_surrogate(models_dir, surrogate, report):
+    models_dir = Path(models_dir)
+    joblib.dump(surrogate, models_dir / SURROGATE_FILE)
+    with open(models_dir / REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_surrogate(models_dir):
+    """返回 (替代模型, 报告)；文件不存在或未达到保真度门槛时模型为 None"""
+    models_dir = Path(models_dir)
+    try:
+        with open(models_dir / REPORT_FILE, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+    if not report.get("passed") or not (models_dir / SURROGATE_FILE).exists():
+        return None, report
+    return joblib.load(models_dir / SURROGATE_FILE), report
@@ -0,0 +1,108 @@
+"""
+对比逐条件布尔筛选（旧实现）与单次联合计数立方体（新实现）的扫描次数和耗时。
+
+用法（在 Backend/ 目录下）：python benchmarks/analysis_cube_bench.py [行数]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import data_loader
+from analysis.aggregates import DatasetAggregates, RISK_FACTORS
+from analysis.age_distribution import get_age_distribution
+from analysis.gender_cancer import get_gender_cancer_stats
+from analysis.correlation_matrix import get_correlation_matrix
+from analysis.age_group_stats import get_age_group_stats
+from analysis.smoking_stats import get_smoking_stats
+from analysis.patient_counts import get_patient_counts
+from benchmarks.synthetic import make_lung_cancer_csv
+
+ANALYSIS_FUNCTIONS = [get_age_distribution, get_gender_cancer_stats, get_correlation_matrix,
+                      get_age_group_stats, get_smoking_stats, get_patient_counts]
+
+
+class ScanCounter:
+    """记录旧实现中每一次整列扫描（布尔比较、分位数、分组）"""
+
+    def __init__(self):
+        self.scans = 0
+
+    def __call__(self, value):
+        self.scans += 1
+        return value
+
+
+def legacy_analysis(df, scan):
+    """按旧实现的方式逐条件扫描数据，仅保留计算部分"""
+    age_bins = list(range(20, 90, 5))
+    scan(df['AGE'].value_counts())
+    for start, end in zip(age_bins[:-1], age_bins[1:]):
+        for label in ('YES', 'NO'):
+            scan(df[scan(scan(df['AGE'] >= start) & scan(df['AGE'] < end)) & scan(df['LUNG_CANCER'] == label)].shape[0])
+    for label in ('YES', 'NO'):
+        group = df[scan(df['LUNG_CANCER'] == label)]
+        for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+            scan(group['AGE'].quantile(q))
+
+    scan(df.groupby(['GENDER_LABEL', 'LUNG_CANCER_LABEL']).size())
+    scan(df[['AGE', 'GENDER_NUMERIC'] + RISK_FACTORS + ['LUNG_CANCER_NUMERIC']].corr())
+    scan(df.groupby([df['AGE'] // 10, 'LUNG_CANCER_LABEL']).size())
+
+    smoking_df = df[scan(df['SMOKING'] == 2)]
+    non_smoking_df = df[scan(df['SMOKING'] == 1)]
+    for group in (smoking_df, non_smoking_df):
+        for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+            scan(group['AGE'].quantile(q))
+        for label in ('YES', 'NO'):
+            scan(group[scan(group['LUNG_CANCER'] == label)].shape[0])
+    for start in range(20, 90, 10):
+        age_range_df = df[scan(scan(df['AGE'] >= start) & scan(df['AGE'] < start + 10))]
+        for value in (2, 1):
+            scan(age_range_df[scan(age_range_df['SMOKING'] == value)].shape[0])
+
+    for label in ('YES', 'NO'):
+        scan(df[scan(df['LUNG_CANCER'] == label)].shape[0])
+        for gender in ('M', 'F'):
+            scan(df[scan(scan(df['GENDER'] == gender) & scan(df['LUNG_CANCER'] == label))].shape[0])
+    for factor in RISK_FACTORS:
+        for value in (2, 1):
+            for label in ('YES', 'NO'):
+                scan(df[scan(scan(df[factor] == value) & scan(df['LUNG_CANCER'] == label))].shape[0])
+
+
+def main(n_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = make_lung_cancer_csv(os.path.join(tmp, 'lung_cancer.csv'), n_rows)
+        data_loader.DATA_PATH = csv_path
+        df = data_loader.get_dataset_snapshot().df
+
+        counter = ScanCounter()
+        start = time.perf_counter()
+        legacy_analysis(df, counter)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        DatasetAggregates.from_frame(df)
+        cube_seconds = time.perf_counter() - start
+
+        # 冷启动：建立立方体 + 生成六个接口的数据；热缓存：仅从立方体派生
+        start = time.perf_counter()
+        for func in ANALYSIS_FUNCTIONS:
+            func()
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for func in ANALYSIS_FUNCTIONS:
+            func()
+        warm_seconds = time.perf_counter() - start
+
+    print(f"行数: {n_rows}")
+    print(f"旧实现: 整列扫描 {counter.scans} 次, 耗时 {legacy_seconds * 1000:.1f} ms")
+    print(f"立方体: 分组 1 次 + 协矩 1 次, 建立耗时 {cube_seconds * 1000:.1f} ms")
+    print(f"六个接口（冷）: {cold_seconds * 1000:.1f} ms, （热）: {warm_seconds * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
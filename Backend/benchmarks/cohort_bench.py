@@ -0,0 +1,82 @@
+"""
+筛选查询的位图索引：分块构建的峰值内存增量（RSS）、构建耗时、桶数，以及逐步叠加筛选条件时单次聚合的延迟。
+数据分两种：均匀随机的合成数据（危险因素组合几乎不重复，桶数最多）与重复拼接的 data/lung_cancer.csv。
+每次测量都在独立子进程中进行，保证峰值互不影响。
+
+用法（在 Backend/ 目录下）：python benchmarks/cohort_bench.py [行数 ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.memory import rss_mb
+
+# 逐步叠加的筛选条件
+STACKED_FLAGS = [('SMOKING', 2), ('COUGHING', 2), ('FATIGUE', 1), ('CHEST PAIN', 2), ('ANXIETY', 1)]
+
+
+def _cohorts():
+    from analysis.cohort import ALL_PATIENTS, Cohort
+
+    cohorts = [('全体', ALL_PATIENTS), ('性别', Cohort('M', None, None, ())),
+               ('性别+年龄', Cohort('M', 40, 70, ()))]
+    for k in range(1, len(STACKED_FLAGS) + 1):
+        cohorts.append((f'+{k}个症状', Cohort('M', 40, 70, tuple(STACKED_FLAGS[:k]))))
+    return cohorts
+
+
+def _child(csv_path):
+    import numpy as np
+
+    from analysis.cohort import CohortIndex
+    from analysis.data_loader import iter_dataset_chunks
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    index = CohortIndex.from_chunks(iter_dataset_chunks(csv_path))
+    build_seconds = time.perf_counter() - start
+    peak = rss_mb() - baseline
+
+    latencies = []
+    for _, cohort in _cohorts():
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            index.aggregate(cohort)
+            timings.append(time.perf_counter() - start)
+        latencies.append(float(np.median(timings)) * 1000)
+    print(peak, build_seconds, index.size, *latencies)
+
+
+def main(row_counts):
+    from benchmarks.synthetic import make_lung_cancer_csv, tile_csv
+
+    labels = [label for label, _ in _cohorts()]
+    print(f"{'数据':<6} {'行数':>10} {'峰值MB':>8} {'构建秒':>8} {'桶数':>9} " + ' '.join(f'{l:>9}' for l in labels))
+    print(' ' * 47 + '（各筛选条件单次聚合的毫秒数）')
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in row_counts:
+            for kind in ('合成', '拼接'):
+                csv_path = os.path.join(tmp, f'lung_{n_rows}.csv')
+                if kind == '合成':
+                    make_lung_cancer_csv(csv_path, n_rows)
+                else:
+                    tile_csv(os.path.join(BACKEND_DIR, 'data', 'lung_cancer.csv'), csv_path, n_rows)
+                output = subprocess.run([sys.executable, __file__, '--child', csv_path], cwd=BACKEND_DIR,
+                                        capture_output=True, text=True, check=True).stdout.split()
+                os.remove(csv_path)
+                peak, seconds, size, *latencies = map(float, output)
+                print(f"{kind:<6} {n_rows:>10} {peak:>8.1f} {seconds:>8.2f} {int(size):>9} "
+                      + ' '.join(f'{ms:>9.3f}' for ms in latencies))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        _child(sys.argv[2])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 4_000_000])
@@ -0,0 +1,79 @@
+"""
+对比直接解析 CSV 与加载内存映射列式缓存的耗时和内存占用。
+每次测量都在独立子进程中进行。
+
+用法（在 Backend/ 目录下）：python benchmarks/columnar_bench.py [行数]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.memory import rss_mb
+from utils.columnar_cache import DIABETES_SCHEMA, INSURANCE_SCHEMA, LUNG_CANCER_SCHEMA
+
+SCHEMAS = {
+    'lung_cancer': LUNG_CANCER_SCHEMA,
+    'insurance': INSURANCE_SCHEMA,
+    'diabetes': DIABETES_SCHEMA,
+}
+
+
+def _child(mode, name, csv_path):
+    import pandas as pd
+    from utils.columnar_cache import load_columnar
+
+    baseline = rss_mb('VmRSS')
+    start = time.perf_counter()
+    if mode == 'csv':
+        df = pd.read_csv(csv_path)
+    else:
+        df = load_columnar(csv_path, SCHEMAS[name])
+    # 触发一次全列读取，保证内存映射的页面真正载入
+    df.select_dtypes('number').sum()
+    seconds = time.perf_counter() - start
+    footprint = df.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f"{seconds:.4f} {footprint:.1f} {rss_mb('VmRSS') - baseline:.1f}")
+
+
+def _measure(mode, name, csv_path):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', mode, name, csv_path],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return [float(value) for value in output]
+
+
+def main(n_rows):
+    from benchmarks.synthetic import make_lung_cancer_csv, tile_csv
+    from utils.columnar_cache import build_columnar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            'lung_cancer': make_lung_cancer_csv(os.path.join(tmp, 'lung_cancer.csv'), n_rows),
+            'insurance': tile_csv(os.path.join(BACKEND_DIR, 'data', 'insurance.csv'),
+                                  os.path.join(tmp, 'insurance.csv'), n_rows),
+            'diabetes': tile_csv(os.path.join(BACKEND_DIR, 'tangniaobing', 'diabetes.csv'),
+                                 os.path.join(tmp, 'diabetes.csv'), n_rows),
+        }
+        print(f"行数: {n_rows}")
+        print(f"{'数据集':<12} {'方式':<8} {'耗时秒':>8} {'数据MB':>8} {'RSS增量MB':>10}")
+        for name, csv_path in paths.items():
+            start = time.perf_counter()
+            build_columnar(csv_path, SCHEMAS[name])
+            build_seconds = time.perf_counter() - start
+            for mode in ('csv', 'columnar'):
+                seconds, footprint, rss = _measure(mode, name, csv_path)
+                print(f"{name:<12} {mode:<8} {seconds:>8.3f} {footprint:>8.1f} {rss:>10.1f}")
+            print(f"{name:<12} {'(转换)':<8} {build_seconds:>8.3f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        _child(*sys.argv[2:5])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,96 @@
+"""
+糖尿病批量 CSV 打分接口的峰值内存（RSS，扣除启动服务后的基线）与吞吐量随文件行数的变化。
+每个行数在独立子进程中启动服务，从磁盘流式上传文件并逐行读取响应，保证峰值互不影响。
+
+用法（在 Backend/ 目录下）：python benchmarks/diabetes_bulk_bench.py [行数 ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.memory import rss_mb
+
+
+def _child(csv_path, fmt):
+    import http.client
+    import logging
+    import socket
+    import threading
+    import warnings
+
+    from flask import Flask
+    from werkzeug.serving import make_server
+
+    from tangniaobing.diabetes_predict_bp import diabetes_predict_bp
+
+    warnings.filterwarnings('ignore')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = Flask(__name__)
+    app.register_blueprint(diabetes_predict_bp)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def post(f, size):
+        """
+        边上传边读取响应：服务端读完第一块就开始返回结果，
+        若像 http.client 那样先发完请求体再读响应，双方的套接字缓冲区写满后会互相等待
+        """
+        sock = socket.create_connection(('127.0.0.1', server.server_port))
+        head = (f'POST /api/predict_diabetes/bulk?format={fmt} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                f'Content-Type: text/csv\r\nContent-Length: {size}\r\nConnection: close\r\n\r\n')
+
+        def send():
+            sock.sendall(head.encode())
+            while block := f.read(1 << 16):
+                sock.sendall(block)
+
+        sender = threading.Thread(target=send)
+        sender.start()
+        response = http.client.HTTPResponse(sock, method='POST')
+        response.begin()
+        lines = sum(1 for _ in response)
+        sender.join()
+        sock.close()
+        return lines
+
+    # 先用小文件预热（加载模型、导入 pandas 解析器），再记录基线
+    warmup = os.path.join(BACKEND_DIR, 'tangniaobing', 'diabetes.csv')
+    with open(warmup, 'rb') as f:
+        post(f, os.path.getsize(warmup))
+    baseline = rss_mb()
+
+    start = time.perf_counter()
+    with open(csv_path, 'rb') as f:
+        lines = post(f, os.path.getsize(csv_path))
+    seconds = time.perf_counter() - start
+    print(f"{rss_mb() - baseline:.1f} {seconds:.2f} {lines}")
+
+
+def main(row_counts):
+    from benchmarks.synthetic import tile_csv
+
+    print(f"{'行数':>10} {'文件MB':>8} {'格式':>8} {'峰值增量MB':>12} {'秒':>8} {'行/秒':>12} {'响应行数':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in row_counts:
+            csv_path = tile_csv(os.path.join(BACKEND_DIR, 'tangniaobing', 'diabetes.csv'),
+                                os.path.join(tmp, f'diabetes_{n_rows}.csv'), n_rows)
+            size_mb = os.path.getsize(csv_path) / 2 ** 20
+            for fmt in ('csv', 'ndjson'):
+                output = subprocess.run([sys.executable, __file__, '--child', csv_path, fmt], cwd=BACKEND_DIR,
+                                        capture_output=True, text=True, check=True).stdout.split()
+                peak, seconds, lines = float(output[0]), float(output[1]), int(output[2])
+                print(f"{n_rows:>10} {size_mb:>8.1f} {fmt:>8} {peak:>12.1f} {seconds:>8.2f} "
+                      f"{n_rows / seconds:>12,.0f} {lines:>10}")
+            os.remove(csv_path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 4_000_000])
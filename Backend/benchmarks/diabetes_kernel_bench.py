@@ -0,0 +1,64 @@
+"""
+糖尿病预测：sklearn 路径（scaler.transform + predict + predict_proba）与折叠后的 FusedLogistic
+在 1 到 1,000,000 个样本下的吞吐量，并校验两者类别与概率是否一致。
+
+用法（在 Backend/ 目录下）：python benchmarks/diabetes_kernel_bench.py [样本数 ...]
+"""
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from tangniaobing.diabetes_model import load_fused_model
+
+MODEL_DIR = os.path.join(BACKEND_DIR, 'tangniaobing')
+
+
+def _samples(n, seed=0):
+    """取值范围与 diabetes.csv 相近的原始特征矩阵"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, 15, n), rng.uniform(40, 200, n), rng.uniform(30, 120, n), rng.uniform(5, 60, n),
+        rng.uniform(10, 500, n), rng.uniform(15, 60, n), rng.uniform(0.05, 2.5, n), rng.integers(20, 80, n),
+    ]).astype(np.float64)
+
+
+def _best_of(func, n):
+    repeat = max(3, min(1000, 100_000 // n))
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    warnings.filterwarnings('ignore')
+    model = joblib.load(os.path.join(MODEL_DIR, 'diabetes_model.pkl'))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+    fused = load_fused_model()
+
+    def sklearn_path(X):
+        scaled = scaler.transform(X)
+        return model.predict(scaled), model.predict_proba(scaled)[:, 1]
+
+    print(f"{'样本数':>10} {'sklearn样本/秒':>16} {'折叠样本/秒':>14} {'加速比':>8} {'结果一致':>8}")
+    for n in sizes:
+        X = _samples(n)
+        expected, actual = sklearn_path(X), fused.score(X)
+        same = np.array_equal(expected[0], actual[0]) and np.array_equal(np.round(expected[1], 2), np.round(actual[1], 2))
+        sklearn_seconds = _best_of(lambda: sklearn_path(X), n)
+        fused_seconds = _best_of(lambda: fused.score(X), n)
+        print(f"{n:>10} {n / sklearn_seconds:>16,.0f} {n / fused_seconds:>14,.0f} "
+              f"{sklearn_seconds / fused_seconds:>7.1f}x {'是' if same else '否':>8}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000])
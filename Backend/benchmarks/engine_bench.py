@@ -0,0 +1,117 @@
+"""
+在不同行数下对比进程内 pandas 引擎与 Spark 引擎计算六个保险分析接口的耗时，
+校验两者结果一致，并给出 Spark 开始占优的行数（用于设置 SPARK_ROWS_THRESHOLD）。
+
+用法（在 Backend/ 目录下）：python benchmarks/engine_bench.py [行数 ...]
+未安装 pyspark 或 Java 时只测 pandas 引擎。
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app import analysis_engine, pandas_analysis
+from benchmarks.synthetic import tile_csv
+
+DEFAULT_SIZES = [1_338, 10_000, 100_000, 1_000_000, 5_000_000, 10_000_000]
+
+# 结果确定的调用，两个引擎必须一致（抽样结果随引擎而异，不参与比较）
+CALLS = {
+    'boxplot': lambda engine: engine.get_boxplot_data(relative_error=0),
+    'boxplot_raw': lambda engine: engine.get_boxplot_data(raw=True),
+    'scatter_bmi': lambda engine: engine.get_scatter_bmi_charges(),
+    'age_hist': lambda engine: engine.get_age_histogram(),
+    'region_avg': lambda engine: engine.get_region_avg_charges(),
+    'scatter_age': lambda engine: engine.get_scatter_age_charges_smoker(),
+    'scatter_age_bins': lambda engine: engine.get_scatter_age_charges_smoker(bins=20),
+    'correlation': lambda engine: engine.get_correlation_data(spearman=True),
+    'correlation_raw': lambda engine: engine.get_correlation_data(raw=True),
+}
+
+
+def _normalize(value):
+    """忽略字典键顺序、网格计数的行序以及浮点求和顺序带来的末位差异"""
+    if isinstance(value, dict):
+        normalized = {k: _normalize(v) for k, v in value.items()}
+        if 'cells' in normalized:
+            normalized['cells'] = sorted(map(tuple, normalized['cells']))
+        return normalized
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float):
+        return float(f'{value:.9g}')
+    return value
+
+
+def _run_all(engine):
+    start = time.perf_counter()
+    results = {name: call(engine) for name, call in CALLS.items()}
+    return results, time.perf_counter() - start
+
+
+def _load_spark():
+    """返回 (spark_analysis 模块, 跳过原因)；未安装 pyspark 时模块为 None"""
+    try:
+        from app import spark_analysis
+        return spark_analysis, None
+    except ImportError:
+        return None, "未安装 pyspark"
+
+
+def _start_spark(spark_analysis):
+    """启动会话并缓存全表，返回 (耗时秒数, 跳过原因)；没有 Java 等原因导致 JVM 无法启动时返回原因"""
+    start = time.perf_counter()
+    try:
+        spark_analysis.get_spark_session().df.count()
+    except Exception as e:
+        return None, f"Spark 会话启动失败（{type(e).__name__}: {e}）"
+    return time.perf_counter() - start, None
+
+
+def main(sizes):
+    spark_analysis, skipped = _load_spark()
+    source = os.path.join(BACKEND_DIR, 'data', 'insurance.csv')
+    print(f"{'行数':>10} {'pandas秒':>9} {'Spark启动秒':>11} {'Spark秒':>8} {'一致':>4}")
+
+    crossover = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            analysis_engine.INSURANCE_CSV = tile_csv(source, os.path.join(tmp, f'insurance_{n_rows}.csv'), n_rows)
+            # 首次加载会生成列式缓存，不计入耗时
+            analysis_engine.load_insurance_frame()
+
+            _run_all(pandas_analysis)
+            pandas_results, pandas_seconds = _run_all(pandas_analysis)
+
+            if spark_analysis is not None:
+                startup_seconds, skipped = _start_spark(spark_analysis)
+                if skipped:
+                    spark_analysis = None
+            if spark_analysis is None:
+                print(f"{n_rows:>10} {pandas_seconds:>9.3f} {'-':>11} {'-':>8} {'-':>4}")
+                continue
+
+            _run_all(spark_analysis)
+            spark_results, spark_seconds = _run_all(spark_analysis)
+            spark_analysis.stop_spark()
+
+            same = _normalize(pandas_results) == _normalize(spark_results)
+            print(f"{n_rows:>10} {pandas_seconds:>9.3f} {startup_seconds:>11.2f} {spark_seconds:>8.3f} "
+                  f"{'是' if same else '否':>4}")
+            if crossover is None and spark_seconds < pandas_seconds:
+                crossover = n_rows
+
+    if spark_analysis is None:
+        print(f"{skipped}，仅测量 pandas 引擎")
+    elif crossover is None:
+        print("在测试的行数范围内 pandas 引擎始终更快")
+    else:
+        print(f"Spark 在约 {crossover} 行时开始占优（分区数 {analysis_engine.partition_count(crossover)}），"
+              f"当前 SPARK_ROWS_THRESHOLD = {analysis_engine.SPARK_ROWS_THRESHOLD}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,60 @@
+"""
+对比 pickle 中的 CalibratedClassifierCV 与数组化推理 CompiledForest 在不同批次行数下的
+predict_proba 耗时，并校验两者概率是否完全一致。
+
+用法（在 Backend/ 目录下）：python benchmarks/forest_bench.py [批次行数 ...]
+"""
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.forest_inference import compile_model
+
+
+def _matrix(n, seed=0):
+    """与 predict_bp 预处理后相同形式的输入：二值特征 0/1（性别可缺失）、标准化后的年龄"""
+    rng = np.random.default_rng(seed)
+    matrix = rng.integers(0, 2, (n, 15)).astype(np.float64)
+    matrix[:, 1] = rng.normal(0, 1, n)
+    matrix[::50, 0] = np.nan
+    return matrix
+
+
+def _best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(batch_sizes):
+    warnings.filterwarnings('ignore')
+    model = joblib.load(os.path.join(BACKEND_DIR, 'models', 'best_lung_cancer_model.pkl'))
+    start = time.perf_counter()
+    compiled = compile_model(model)
+    print(f"展开 {len(compiled.roots)} 棵树、{len(compiled.value)} 个节点耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    print(f"{'批次行数':>10} {'sklearn毫秒':>12} {'数组化毫秒':>12} {'加速比':>8} {'最大误差':>10}")
+    for n in batch_sizes:
+        matrix = _matrix(n)
+        frame = pd.DataFrame(matrix, columns=model.feature_names_in_)
+        expected, actual = model.predict_proba(frame), compiled.predict_proba(matrix)
+        repeat = 3 if n >= 5000 else 20
+        sklearn_seconds = _best_of(lambda: model.predict_proba(frame), repeat)
+        compiled_seconds = _best_of(lambda: compiled.predict_proba(matrix), repeat)
+        print(f"{n:>10} {sklearn_seconds * 1000:>12.2f} {compiled_seconds * 1000:>12.2f} "
+              f"{sklearn_seconds / compiled_seconds:>7.1f}x {np.abs(expected - actual).max():>10.1e}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1, 100, 10_000])
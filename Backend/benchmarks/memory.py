@@ -0,0 +1,17 @@
+import resource
+
+
+def rss_mb(field='VmHWM'):
+    """
+    当前进程的内存（MB）：VmHWM 为峰值 RSS，VmRSS 为当前 RSS。
+    ru_maxrss 会继承父进程的峰值，因此优先读取 /proc/self/status。
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
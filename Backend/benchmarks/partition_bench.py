@@ -0,0 +1,83 @@
+"""
+对比放大后的 insurance 数据集上全量查询与带 region/smoker/年龄筛选的查询耗时，
+筛选条件下推到分区列式数据后只读取匹配的分区。
+
+用法（在 Backend/ 目录下）：python benchmarks/partition_bench.py [行数]
+未安装 pyspark 或 Java 时只测 pandas 引擎。
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app import analysis_engine, pandas_analysis
+from app.analysis_engine import InsuranceFilter
+from benchmarks.synthetic import tile_csv
+
+QUERIES = {
+    '全量': None,
+    'region': InsuranceFilter('southeast', None, None, None),
+    'region+smoker': InsuranceFilter('southeast', 'yes', None, None),
+    'region+smoker+年龄': InsuranceFilter('southeast', 'yes', 40, 60),
+}
+
+CALLS = {
+    'boxplot': lambda engine, filters: engine.get_boxplot_data(filters=filters),
+    'age_hist': lambda engine, filters: engine.get_age_histogram(filters=filters),
+    'region_avg': lambda engine, filters: engine.get_region_avg_charges(filters=filters),
+    'scatter_bins': lambda engine, filters: engine.get_scatter_age_charges_smoker(bins=50, filters=filters),
+}
+
+
+def _best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(engine_name, engine):
+    print(f"\n引擎: {engine_name}")
+    print(f"{'条件':<18} {'命中行数':>10} " + ' '.join(f'{name:>12}' for name in CALLS))
+    for label, filters in QUERIES.items():
+        rows = len(analysis_engine.load_insurance_frame(filters))
+        seconds = [_best_of(lambda: call(engine, filters)) for call in CALLS.values()]
+        print(f"{label:<18} {rows:>10} " + ' '.join(f'{s:>11.3f}s' for s in seconds))
+
+
+def main(n_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        analysis_engine.INSURANCE_CSV = tile_csv(os.path.join(BACKEND_DIR, 'data', 'insurance.csv'),
+                                                 os.path.join(tmp, 'insurance.csv'), n_rows)
+        start = time.perf_counter()
+        analysis_engine.load_insurance_frame()
+        analysis_engine.load_insurance_partitions()
+        print(f"行数: {n_rows}，生成列式缓存与分区数据耗时 {time.perf_counter() - start:.1f}s")
+
+        _report('pandas', pandas_analysis)
+
+        try:
+            from app import spark_analysis
+        except ImportError:
+            print("\n未安装 pyspark，跳过 Spark 引擎")
+            return
+        start = time.perf_counter()
+        try:
+            spark_analysis.get_spark_session().df.count()
+        except Exception as e:
+            # 没有 Java 等原因导致 JVM 无法启动
+            print(f"\nSpark 会话启动失败（{type(e).__name__}: {e}），跳过 Spark 引擎")
+            return
+        print(f"\nSpark 由 CSV 写出分区 Parquet 并缓存全表耗时 {time.perf_counter() - start:.1f}s"
+              f"（全量查询读缓存，带条件的查询只读取匹配的分区）")
+        _report('spark', spark_analysis)
+        spark_analysis.stop_spark()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
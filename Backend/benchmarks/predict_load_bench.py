@@ -0,0 +1,102 @@
+"""
+单条肺癌预测接口的并发压测：分别以 1/8/64 个并发客户端持续发送单个患者，
+对比开启与关闭微批调度时的吞吐、延迟分位数与平均批次行数。
+
+用法（在 Backend/ 目录下）：python benchmarks/predict_load_bench.py [每档秒数]
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.request
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from app.predict_bp import create_predict_bp
+
+CONCURRENCY = (1, 8, 64)
+SYMPTOMS = ["smoking", "yellow_fingers", "anxiety", "peer_pressure", "chronic_disease", "fatigue", "allergy",
+            "wheezing", "alcohol_consuming", "coughing", "shortness_of_breath", "swallowing_difficulty",
+            "chest_pain"]
+
+
+def _patients(n, seed=0):
+    rng = np.random.default_rng(seed)
+    patients = []
+    for _ in range(n):
+        patient = {"gender": str(rng.choice(['M', 'F'])), "age": int(rng.integers(20, 90))}
+        patient.update({key: int(rng.integers(1, 3)) for key in SYMPTOMS})
+        patients.append(json.dumps(patient).encode('utf-8'))
+    return patients
+
+
+def _serve(batch_window_ms):
+    app = Flask(__name__)
+    app.register_blueprint(create_predict_bp(os.path.join(BACKEND_DIR, 'models', 'best_lung_cancer_model.pkl'),
+                                             os.path.join(BACKEND_DIR, 'models', 'scaler.pkl'),
+                                             batch_window_ms=batch_window_ms), url_prefix='/api')
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/api'
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return response.read()
+
+
+def _load(url, clients, seconds, patients):
+    latencies = [[] for _ in range(clients)]
+    stop = time.perf_counter() + seconds
+
+    def client(i):
+        k = i
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            _post(url + '/predict', patients[k % len(patients)])
+            latencies[i].append(time.perf_counter() - start)
+            k += clients
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    all_latencies = np.concatenate([np.asarray(x) for x in latencies]) * 1000
+    return len(all_latencies) / elapsed, np.percentile(all_latencies, 50), np.percentile(all_latencies, 99)
+
+
+def main(seconds):
+    warnings.filterwarnings('ignore')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    patients = _patients(1000)
+    print(f"{'模式':<8} {'并发':>6} {'请求/秒':>10} {'p50毫秒':>10} {'p99毫秒':>10} {'平均批次':>10}")
+    for label, window_ms in (('直接推理', 0), ('微批2ms', 2)):
+        server, url = _serve(window_ms)
+        try:
+            _post(url + '/predict', patients[0])
+            for clients in CONCURRENCY:
+                before = json.loads(urllib.request.urlopen(url + '/predict/metrics').read())
+                throughput, p50, p99 = _load(url, clients, seconds, patients)
+                after = json.loads(urllib.request.urlopen(url + '/predict/metrics').read())
+                batches = after.get('batches', 0) - before.get('batches', 0)
+                mean_batch = (after['rows'] - before['rows']) / batches if batches else 1.0
+                print(f"{label:<8} {clients:>6} {throughput:>10.0f} {p50:>10.2f} {p99:>10.2f} {mean_batch:>10.1f}")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
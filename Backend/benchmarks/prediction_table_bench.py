@@ -0,0 +1,79 @@
+"""
+肺癌预测查找表：float32 / float16 两种存储下的构建耗时、内存占用、单条查找延迟，
+并在随机抽取的表项上与 pickle 模型的 predict_proba 对比概率误差与类别。
+
+用法（在 Backend/ 目录下）：python benchmarks/prediction_table_bench.py
+"""
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.forest_inference import compile_model
+from app.prediction_table import PredictionTable
+
+FIELDS = ["gender", "age", "smoking", "yellow_fingers", "anxiety", "peer_pressure", "chronic_disease", "fatigue",
+          "allergy", "wheezing", "alcohol_consuming", "coughing", "shortness_of_breath", "swallowing_difficulty",
+          "chest_pain"]
+
+
+def _records(n, table, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(n):
+        record = {"gender": str(rng.choice(['M', 'F'])), "age": int(rng.integers(table.age_min, table.age_max + 1))}
+        record.update({field: int(rng.integers(1, 3)) for field in FIELDS[2:]})
+        records.append(record)
+    return records
+
+
+def _matrix(records, scaler):
+    """与 predict_bp 预处理相同的模型输入"""
+    matrix = np.array([[1.0 if r['gender'] == 'M' else 0.0, r['age']] + [r[f] - 1.0 for f in FIELDS[2:]]
+                       for r in records])
+    matrix[:, 1] = (matrix[:, 1] - scaler.mean_[0]) / scaler.scale_[0]
+    return matrix
+
+
+def _per_call_us(func, records):
+    start = time.perf_counter()
+    for record in records:
+        func(record)
+    return (time.perf_counter() - start) / len(records) * 1e6
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    model = joblib.load(os.path.join(BACKEND_DIR, 'models', 'best_lung_cancer_model.pkl'))
+    scaler = joblib.load(os.path.join(BACKEND_DIR, 'models', 'scaler.pkl'))
+    compiled = compile_model(model)
+
+    print(f"{'存储类型':<10} {'表项数':>10} {'构建秒':>8} {'内存MB':>8} {'查找微秒':>10} {'最大误差':>10} {'类别不一致':>10}")
+    for dtype in (np.float32, np.float16):
+        table = PredictionTable(compiled, scaler, FIELDS, dtype=dtype)
+        records = _records(10_000, table)
+        expected = model.predict_proba(pd.DataFrame(_matrix(records, scaler), columns=model.feature_names_in_))
+        looked_up = [table.lookup(record) for record in records]
+        error = max(abs(float(p) - e) for (_, p), e in zip(looked_up, expected[:, 1]))
+        mismatched = sum(int(label) != int(e) for (label, _), e in zip(looked_up, np.argmax(expected, axis=1)))
+        lookup_us = _per_call_us(table.lookup, records)
+        print(f"{np.dtype(dtype).name:<10} {len(table.probability):>10} {table.build_seconds:>8.2f} "
+              f"{table.info()['bytes'] / 2 ** 20:>8.2f} {lookup_us:>10.2f} {error:>10.1e} {mismatched:>10}")
+
+    # 对照：同样的单条输入走数组化推理与 pickle 模型
+    records = _records(200, table)
+    compiled_us = _per_call_us(lambda r: compiled.predict_proba(_matrix([r], scaler)), records)
+    sklearn_us = _per_call_us(
+        lambda r: model.predict_proba(pd.DataFrame(_matrix([r], scaler), columns=model.feature_names_in_)), records)
+    print(f"\n单条推理对照：数组化推理 {compiled_us:.0f} 微秒，pickle 模型 {sklearn_us:.0f} 微秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+对比原 RDD + Python lambda 实现与 DataFrame 原生聚合实现在放大后的 insurance 数据集上的耗时。
+
+用法（在 Backend/ 目录下，需要 pyspark 与 Java）：python benchmarks/spark_bench.py [行数]
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app import analysis_engine, spark_analysis
+from benchmarks.synthetic import tile_csv
+
+
+def _legacy_functions(rdd):
+    """原实现：每行经 Python worker 反序列化后由 lambda 处理"""
+    return {
+        'boxplot': lambda: rdd.map(lambda row: (row['smoker'], row['charges']))
+            .filter(lambda x: None not in x).groupByKey().mapValues(list).collect(),
+        'scatter_bmi': lambda: rdd.map(lambda row: (row['bmi'], row['charges']))
+            .filter(lambda x: None not in x).collect(),
+        'age_hist': lambda: rdd.map(lambda row: row['age']).filter(lambda x: x is not None).collect(),
+        'region_avg': lambda: rdd.map(lambda row: (row['region'], (row['charges'], 1)))
+            .filter(lambda x: x[0] is not None and x[1][0] is not None)
+            .reduceByKey(lambda a, b: (a[0] + b[0], a[1] + b[1]))
+            .mapValues(lambda x: round(x[0] / x[1], 2)).collect(),
+        'scatter_age': lambda: rdd.map(lambda row: (row['age'], row['charges'], row['smoker']))
+            .filter(lambda x: None not in x).collect(),
+        'correlation': lambda: rdd.map(lambda row: (row['age'], row['bmi'], row['children'], row['charges']))
+            .filter(lambda x: None not in x).collect(),
+    }
+
+
+# 与原实现返回相同的原始数据格式
+NEW_FUNCTIONS = {
+    'boxplot': lambda: spark_analysis.get_boxplot_data(raw=True),
+    'scatter_bmi': spark_analysis.get_scatter_bmi_charges,
+    'age_hist': lambda: spark_analysis.get_age_histogram(raw=True),
+    'region_avg': spark_analysis.get_region_avg_charges,
+    'scatter_age': spark_analysis.get_scatter_age_charges_smoker,
+    'correlation': lambda: spark_analysis.get_correlation_data(raw=True),
+}
+
+
+def _best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = tile_csv(os.path.join(BACKEND_DIR, 'data', 'insurance.csv'),
+                            os.path.join(tmp, 'insurance.csv'), n_rows)
+        # 让 spark_analysis 中的函数直接使用这份放大后的数据
+        analysis_engine.INSURANCE_CSV = csv_path
+        spark = spark_analysis.get_spark_session()
+        spark.df.count()
+
+        legacy = _legacy_functions(spark.df.rdd)
+        print(f"行数: {n_rows}")
+        print(f"{'接口':<12} {'RDD秒':>8} {'DataFrame秒':>12} {'加速':>6}")
+        for name, func in NEW_FUNCTIONS.items():
+            old_seconds = _best_of(legacy[name])
+            new_seconds = _best_of(func)
+            print(f"{name:<12} {old_seconds:>8.3f} {new_seconds:>12.3f} {old_seconds / new_seconds:>6.1f}x")
+        spark_analysis.stop_spark()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,56 @@
+"""
+整表载入与分块流式聚合的峰值内存增量（RSS，扣除导入依赖后的基线）随行数的变化。
+每次测量都在独立子进程中进行，保证峰值互不影响。
+
+用法（在 Backend/ 目录下）：python benchmarks/streaming_bench.py [行数 ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.memory import rss_mb
+
+
+def _child(mode, csv_path):
+    from analysis.aggregates import DatasetAggregates
+    from analysis.data_loader import get_dataset_snapshot, iter_dataset_chunks
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    if mode == 'full':
+        DatasetAggregates.from_frame(get_dataset_snapshot(csv_path).df)
+    else:
+        DatasetAggregates.from_chunks(iter_dataset_chunks(csv_path))
+    seconds = time.perf_counter() - start
+    print(f"{rss_mb() - baseline:.1f} {seconds:.2f}")
+
+
+def main(row_counts):
+    from benchmarks.synthetic import make_lung_cancer_csv
+
+    print(f"{'行数':>10} {'整表峰值MB':>12} {'流式峰值MB':>12} {'整表秒':>8} {'流式秒':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in row_counts:
+            csv_path = make_lung_cancer_csv(os.path.join(tmp, f'lung_{n_rows}.csv'), n_rows)
+            results = {}
+            for mode in ('full', 'stream'):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', mode, csv_path],
+                    cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+                ).stdout.split()
+                results[mode] = (float(output[0]), float(output[1]))
+            os.remove(csv_path)
+            print(f"{n_rows:>10} {results['full'][0]:>12.1f} {results['stream'][0]:>12.1f} "
+                  f"{results['full'][1]:>8.2f} {results['stream'][1]:>8.2f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 4_000_000])
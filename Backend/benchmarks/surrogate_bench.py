@@ -0,0 +1,80 @@
+"""
+对比校准随机森林（原模型）与 main.py 蒸馏出的替代模型：文件大小、加载耗时、加载后 RSS 增量，
+以及不同批次行数下 predict_proba 的耗时。每个模型的加载在独立子进程中测量。
+
+用法（在 Backend/ 目录下）：python benchmarks/surrogate_bench.py [模型目录]
+替代模型需先运行 python main.py 生成。
+"""
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.memory import rss_mb
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def _child(model_path):
+    import joblib
+    import numpy as np
+    import pandas as pd
+    # 先导入两种模型依赖的模块，RSS 增量只计模型本身
+    import sklearn.calibration
+    import sklearn.ensemble
+
+    warnings.filterwarnings('ignore')
+    baseline = rss_mb('VmRSS')
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    load_seconds = time.perf_counter() - start
+    loaded_mb = rss_mb('VmRSS') - baseline
+
+    rng = np.random.default_rng(0)
+    timings = []
+    for n in BATCH_SIZES:
+        X = rng.integers(0, 2, (n, 15)).astype(np.float64)
+        X[:, 1] = rng.normal(0, 1, n)
+        frame = pd.DataFrame(X, columns=model.feature_names_in_)
+        model.predict_proba(frame)
+        repeat = 3 if n >= 10_000 else 20
+        start = time.perf_counter()
+        for _ in range(repeat):
+            model.predict_proba(frame)
+        timings.append((time.perf_counter() - start) / repeat * 1000)
+    print(load_seconds, loaded_mb, *timings)
+
+
+def main(models_dir):
+    from app.surrogate import REPORT_FILE, SURROGATE_FILE, load_surrogate
+
+    _, report = load_surrogate(models_dir)
+    if report is None:
+        print(f"{models_dir} 下没有 {REPORT_FILE}，请先运行 python main.py")
+        return
+    held_out, random_inputs = report['held_out'], report['random_inputs']
+    print(f"保真度：留出集 AUC {held_out['surrogate_auc']:.4f}（原模型 {held_out['teacher_auc']:.4f}），"
+          f"一致率 {held_out['agreement']:.4f}，最大偏差 {held_out['max_deviation']:.4f}；"
+          f"随机输入一致率 {random_inputs['agreement']:.4f}，最大偏差 {random_inputs['max_deviation']:.4f}；"
+          f"{'达到' if report['passed'] else '未达到'}门槛\n")
+
+    print(f"{'模型':<10} {'文件MB':>8} {'加载秒':>8} {'RSS增量MB':>10} "
+          + ' '.join(f'{f"{n}行毫秒":>10}' for n in BATCH_SIZES))
+    for label, filename in (('原模型', 'best_lung_cancer_model.pkl'), ('替代模型', SURROGATE_FILE)):
+        path = os.path.join(models_dir, filename)
+        output = subprocess.run([sys.executable, __file__, '--child', path], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.split()
+        load_seconds, loaded_mb, *timings = map(float, output)
+        print(f"{label:<10} {os.path.getsize(path) / 2 ** 20:>8.2f} {load_seconds:>8.3f} {loaded_mb:>10.1f} "
+              + ' '.join(f'{t:>10.2f}' for t in timings))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        _child(sys.argv[2])
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(BACKEND_DIR, 'models'))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+LUNG_CANCER_COLUMNS = ['GENDER', 'AGE', 'SMOKING', 'YELLOW_FINGERS', 'ANXIETY',
+                       'PEER_PRESSURE', 'CHRONIC DISEASE', 'FATIGUE ', 'ALLERGY ',
+                       'WHEEZING', 'ALCOHOL CONSUMING', 'COUGHING',
+                       'SHORTNESS OF BREATH', 'SWALLOWING DIFFICULTY',
+                       'CHEST PAIN', 'LUNG_CANCER']
+
+
+def make_lung_cancer_frame(n_rows, seed=42):
+    """生成与 data/lung_cancer.csv 表头一致的合成数据"""
+    rng = np.random.default_rng(seed)
+    data = {
+        'GENDER': rng.choice(['M', 'F'], size=n_rows),
+        'AGE': rng.integers(21, 88, size=n_rows),
+    }
+    for col in LUNG_CANCER_COLUMNS[2:-1]:
+        data[col] = rng.integers(1, 3, size=n_rows)
+    data['LUNG_CANCER'] = rng.choice(['YES', 'NO'], size=n_rows, p=[0.87, 0.13])
+    return pd.DataFrame(data, columns=LUNG_CANCER_COLUMNS)
+
+
+def make_lung_cancer_csv(path, n_rows, seed=42):
+    make_lung_cancer_frame(n_rows, seed).to_csv(path, index=False)
+    return path
+
+
+def tile_csv(source_path, path, n_rows):
+    """将小数据集重复拼接到指定行数，用于放大 insurance.csv / diabetes.csv"""
+    source = pd.read_csv(source_path)
+    repeats = -(-n_rows // len(source))
+    pd.concat([source] * repeats, ignore_index=True).iloc[:n_rows].to_csv(path, index=False)
+    return path
@@ -10,6 +10,8 @@ import joblib
 from pathlib import Path
 import warnings
 
+from app.surrogate import distill, distillation_set, fidelity_report, save_surrogate
+
 def main():
     warnings.filterwarnings('ignore')
 
@@ -80,6 +82,16 @@ def main():
     joblib.dump(scaler, models_dir / 'scaler.pkl')
     print("模型和标准化器已保存到 models/ 目录。")
 
+    # 蒸馏替代模型：以校准森林的概率为软标签训练紧凑的直方图梯度提升模型，并写出保真度报告
+    surrogate = distill(calibrated_clf, distillation_set(X_train, scaler))
+    report = fidelity_report(calibrated_clf, surrogate, X_test, y_test, scaler)
+    save_surrogate(models_dir, surrogate, report)
+    held_out = report['held_out']
+    print(f"替代模型：留出集 AUC {held_out['surrogate_auc']:.4f}（原模型 {held_out['teacher_auc']:.4f}），"
+          f"类别一致率 {held_out['agreement']:.4f}，最大概率偏差 {held_out['max_deviation']:.4f}，"
+          f"随机输入类别一致率 {report['random_inputs']['agreement']:.4f}，"
+          f"{'达到' if report['passed'] else '未达到'}保真度门槛")
+
     # 测试样本
     test_samples = [
         [1, 70, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1],
@@ -1,4 +1,6 @@
 
+import os
+
 from flask_cors import CORS
 from tangniaobing.diabetes_predict_bp import diabetes_predict_bp  # 糖尿病预测蓝图
 from app.predict_bp import create_predict_bp  # 肺癌预测蓝图工厂
@@ -12,6 +14,8 @@ from app.apis.age_hist_api import age_hist_api
 from app.apis.region_avg_api import region_avg_api
 from app.apis.scatter_age_api import scatter_age_api
 from app.apis.correlation_api import correlation_api
+from app.apis.warmup_api import warmup_api
+from app.analysis_engine import start_warmup
 
 
 app = Flask(__name__)
@@ -39,6 +43,12 @@ app.register_blueprint(age_hist_api, url_prefix='/api/analysis/age_hist')
 app.register_blueprint(region_avg_api, url_prefix='/api/analysis/region_avg')
 app.register_blueprint(scatter_age_api, url_prefix='/api/analysis/scatter_age')
 app.register_blueprint(correlation_api, url_prefix='/api/analysis/correlation')
+app.register_blueprint(warmup_api, url_prefix='/api/analysis/warmup')
+
+# 设置 ANALYSIS_WARMUP=1 时在后台预热分析引擎并预先计算保险分析结果，
+# 可通过 /api/analysis/warmup 查询是否完成；debug 重载器的监控进程不预热
+if os.environ.get('ANALYSIS_WARMUP') == '1' and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    start_warmup()
 
 if __name__ == '__main__':
     app.run(debug=True)
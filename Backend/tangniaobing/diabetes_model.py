@@ -7,14 +7,23 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, roc_curve, auc
 import joblib  # 用于模型保存和加载
 import os
+import sys
+from functools import lru_cache
+
+from scipy.special import expit
+
+# 添加 Backend 目录到 sys.path，确保能找到 utils 包
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.columnar_cache import DIABETES_SCHEMA, load_columnar
 
 # 全局变量
 scaler = StandardScaler()
 model = LogisticRegression()
 
 def train_model(data_path="diabetes.csv", model_path="diabetes_model.pkl", scaler_path="scaler.pkl"):
-    # 1. 读取数据
-    df = pd.read_csv(data_path)
+    # 1. 读取数据（内存映射的列式缓存，写时复制，CSV 更新后自动重建）
+    df = load_columnar(data_path, DIABETES_SCHEMA, writable=True)
 
     # 2. 替换0为NaN并填充均值
     cols_with_zeros = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"]
@@ -59,59 +68,117 @@ def train_model(data_path="diabetes.csv", model_path="diabetes_model.pkl", scale
     joblib.dump(model, model_path)
     joblib.dump(scaler, scaler_path)
 
-def predict_samples(samples, model_path=None, scaler_path=None):
+# 模型训练时使用的特征顺序（大小写敏感）
+FEATURE_ORDER = ["Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+                 "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"]
+
+# 定义字段映射（前端小写字段 -> 模型字段）
+FIELD_MAP = {
+    "pregnancies": "Pregnancies",
+    "glucose": "Glucose",
+    "blood_pressure": "BloodPressure",
+    "skin_thickness": "SkinThickness",
+    "insulin": "Insulin",
+    "bmi": "BMI",
+    "diabetes_pedigree_function": "DiabetesPedigreeFunction",
+    "age": "Age"
+}
+
+# 前端小写字段 -> 特征列号
+FIELD_INDEX = {key: FEATURE_ORDER.index(feature) for key, feature in FIELD_MAP.items()}
+
+# 批量 CSV 打分时每块的行数，决定峰值内存
+CSV_CHUNK_ROWS = 50_000
+
+# 折叠后的结果与先标准化再计算的结果只在末位有差别，
+# 决策值接近 0 或概率接近两位小数的舍入边界时按原顺序重算，保证结果与 sklearn 完全一致
+BOUNDARY_EPS = 1e-9
+
+
+class FusedLogistic:
+    """
+    StandardScaler + 二分类 LogisticRegression 折叠为一次仿射变换和 sigmoid：
+    w' = w / scale，b' = b - w' · mean，对 (n, 8) 的原始特征矩阵直接打分。
+    """
+
+    def __init__(self, model, scaler):
+        n_features = model.coef_.shape[1]
+        self.coef = model.coef_
+        self.intercept = model.intercept_
+        self.mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        self.scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        self.classes = model.classes_
+        self.weights = self.coef.ravel() / self.scale
+        self.bias = self.intercept[0] - np.dot(self.weights, self.mean)
+
+    def _exact_decision(self, X):
+        """与 scaler.transform + model.decision_function 相同的计算顺序"""
+        return (((X - self.mean) / self.scale) @ self.coef.T + self.intercept).ravel()
+
+    def score(self, X):
+        """返回 (类别, 患病概率)，与 model.predict / model.predict_proba[:, 1] 一致"""
+        X = np.asarray(X, dtype=np.float64)
+        # 与 sklearn 的输入检查一致，不接受缺失值和无穷大
+        if not np.isfinite(X).all():
+            raise ValueError("输入包含 NaN 或无穷大")
+        decision = X @ self.weights + self.bias
+        probability = expit(decision)
+        scaled = probability * 100
+        near = (np.abs(decision) < BOUNDARY_EPS) | (np.abs(scaled - np.floor(scaled) - 0.5) < BOUNDARY_EPS)
+        if near.any():
+            decision[near] = self._exact_decision(X[near])
+            probability[near] = expit(decision[near])
+        return self.classes[(decision > 0).astype(int)], probability
+
+
+@lru_cache(maxsize=8)
+def _load_fused(model_path, scaler_path, version):
+    return FusedLogistic(joblib.load(model_path), joblib.load(scaler_path))
+
+
+def load_fused_model(model_path=None, scaler_path=None):
+    """加载并折叠模型；按文件修改时间缓存，模型文件更新后自动重新加载"""
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     if model_path is None:
         model_path = os.path.join(BASE_DIR, "diabetes_model.pkl")
     if scaler_path is None:
         scaler_path = os.path.join(BASE_DIR, "scaler.pkl")
+    version = (os.stat(model_path).st_mtime_ns, os.stat(scaler_path).st_mtime_ns)
+    return _load_fused(model_path, scaler_path, version)
+
 
-    # 加载模型与Scaler
-    model = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
+def samples_to_matrix(samples):
+    """样本字典列表 -> (n, 8) 特征矩阵，字段名不区分大小写，缺失字段补 0"""
+    matrix = np.empty((len(samples), len(FEATURE_ORDER)))
+    for i, sample_dict in enumerate(samples):
+        row = [0] * len(FEATURE_ORDER)
+        for key, value in sample_dict.items():
+            j = FIELD_INDEX.get(key.lower())
+            if j is not None:
+                row[j] = value
+        matrix[i] = [float(value) for value in row]
+    return matrix
 
-    # 模型训练时使用的特征顺序（大小写敏感）
-    FEATURE_ORDER = ["Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
-                     "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"]
 
-    # 定义字段映射（前端小写字段 -> 模型字段）
-    FIELD_MAP = {
-        "pregnancies": "Pregnancies",
-        "glucose": "Glucose",
-        "blood_pressure": "BloodPressure",
-        "skin_thickness": "SkinThickness",
-        "insulin": "Insulin",
-        "bmi": "BMI",
-        "diabetes_pedigree_function": "DiabetesPedigreeFunction",
-        "age": "Age"
-    }
+def iter_csv_predictions(csv_file, chunksize=CSV_CHUNK_ROWS, model_path=None, scaler_path=None):
+    """
+    按块读取 diabetes.csv 格式的 CSV（Outcome 等多余列忽略，空值补 0），逐块向量化打分，
+    每块产出 (预测类别, 概率) 数组，内存占用只与块大小有关
+    """
+    model = load_fused_model(model_path, scaler_path)
+    reader = pd.read_csv(csv_file, usecols=FEATURE_ORDER, dtype=np.float64, chunksize=chunksize)
+    for chunk in reader:
+        yield model.score(chunk[FEATURE_ORDER].fillna(0).to_numpy())
 
-    processed_samples = []
 
+def predict_samples(samples, model_path=None, scaler_path=None):
     # 兼容前端传入单个样本（dict）或多个样本（list）
     if isinstance(samples, dict):
         samples = [samples]
     elif not isinstance(samples, list):
         raise ValueError("输入格式错误，应为 dict 或 list。")
 
-    for sample_dict in samples:
-        converted_sample = {}
-        for key, value in sample_dict.items():
-            mapped_key = FIELD_MAP.get(key.lower())
-            if mapped_key:
-                converted_sample[mapped_key] = value
-
-        # 如果某些字段缺失，补0
-        row = [float(converted_sample.get(feat, 0)) for feat in FEATURE_ORDER]
-        processed_samples.append(row)
-
-    # 转为 NumPy 数组并标准化
-    test_samples = np.array(processed_samples)
-    test_samples_scaled = scaler.transform(test_samples)
-
-    # 模型预测
-    predictions = model.predict(test_samples_scaled)
-    probabilities = model.predict_proba(test_samples_scaled)[:, 1]
+    predictions, probabilities = load_fused_model(model_path, scaler_path).score(samples_to_matrix(samples))
 
     # 返回结果
     results = []
@@ -1,12 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import io
+import itertools
+import json
+import time
 import traceback
 import sys
 import os
 
+import numpy as np
+import pandas as pd
+
 # 添加当前文件目录到 sys.path，确保能找到同目录的 diabetes_model.py
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from diabetes_model import predict_samples
+from diabetes_model import iter_csv_predictions, predict_samples
 
 diabetes_predict_bp = Blueprint('diabetes_predict_bp', __name__)
 
@@ -39,4 +46,68 @@ def predict_1():
         }), 500
 
 
+def _stream_results(batches, fmt, stream):
+    """逐块输出结果行，最后一行为汇总（CSV 中以 # 开头）；中途出错时停止并在汇总中给出错误，结束后关闭输入流"""
+    start = time.perf_counter()
+    rows = positives = 0
+    error = None
+    if fmt == 'csv':
+        yield "样本编号,预测结果,概率\n"
+    try:
+        for predictions, probabilities in batches:
+            frame = pd.DataFrame({
+                "样本编号": np.arange(rows + 1, rows + len(predictions) + 1),
+                "预测结果": np.where(predictions == 1, "糖尿病", "未患糖尿病"),
+                "概率": np.round(probabilities, 2),
+            })
+            if fmt == 'csv':
+                yield frame.to_csv(header=False, index=False)
+            else:
+                yield frame.to_json(orient='records', lines=True, force_ascii=False)
+            rows += len(predictions)
+            positives += int(np.count_nonzero(predictions == 1))
+    except ValueError as e:
+        error = str(e)
+    finally:
+        stream.close()
+
+    summary = {"rows": rows, "diabetes": positives, "seconds": round(time.perf_counter() - start, 3)}
+    if error is not None:
+        summary["error"] = error
+    if fmt == 'csv':
+        yield "# " + json.dumps(summary, ensure_ascii=False) + "\n"
+    else:
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+
+
+@diabetes_predict_bp.route('/api/predict_diabetes/bulk', methods=['POST'])
+def predict_bulk():
+    """
+    批量 CSV 打分：上传 diabetes.csv 格式的文件（表单字段 file，或直接作为请求体），
+    边读取边按块打分并流式返回，?format=csv（默认）或 ndjson，最后一行为行数等汇总
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "format 应为 csv 或 ndjson"}), 400
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "缺少上传文件 file"}), 400
+        # 请求结束时 Flask 会关闭上传文件（超过 500KB 时已暂存到磁盘），改由响应生成器持有并在读完后关闭
+        stream, upload.stream = upload.stream, io.BytesIO()
+    else:
+        stream = request.stream
+
+    # 先读取第一块，表头或数据格式错误时仍可返回 400
+    batches = iter_csv_predictions(stream)
+    try:
+        first = next(batches, None)
+    except ValueError as e:
+        stream.close()
+        return jsonify({"error": f"CSV 格式错误: {e}"}), 400
+    if first is not None:
+        batches = itertools.chain([first], batches)
 
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(_stream_results(batches, fmt, stream)), mimetype=mimetype)
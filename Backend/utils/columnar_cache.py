@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 列式缓存格式版本，格式变化时旧缓存自动重建
+FORMAT_VERSION = 1
+SIDECAR_SUFFIX = '.columnar'
+META_FILE = 'meta.json'
+
+# 各数据集的列类型（列名已去除首尾空格）；'category' 表示以整数编码 + 类别表存储
+LUNG_CANCER_SCHEMA = {
+    'GENDER': 'category',
+    'AGE': 'int8',
+    'SMOKING': 'int8',
+    'YELLOW_FINGERS': 'int8',
+    'ANXIETY': 'int8',
+    'PEER_PRESSURE': 'int8',
+    'CHRONIC DISEASE': 'int8',
+    'FATIGUE': 'int8',
+    'ALLERGY': 'int8',
+    'WHEEZING': 'int8',
+    'ALCOHOL CONSUMING': 'int8',
+    'COUGHING': 'int8',
+    'SHORTNESS OF BREATH': 'int8',
+    'SWALLOWING DIFFICULTY': 'int8',
+    'CHEST PAIN': 'int8',
+    'LUNG_CANCER': 'category',
+}
+
+# bmi 和 charges 会原样返回给前端，保留 float64 以免出现 27.899999618530273 这样的数值
+INSURANCE_SCHEMA = {
+    'age': 'int8',
+    'sex': 'category',
+    'bmi': 'float64',
+    'children': 'int8',
+    'smoker': 'category',
+    'region': 'category',
+    'charges': 'float64',
+}
+
+DIABETES_SCHEMA = {
+    'Pregnancies': 'int8',
+    'Glucose': 'int16',
+    'BloodPressure': 'int16',
+    'SkinThickness': 'int16',
+    'Insulin': 'int16',
+    'BMI': 'float32',
+    'DiabetesPedigreeFunction': 'float32',
+    'Age': 'int8',
+    'Outcome': 'int8',
+}
+
+
+def sidecar_dir(csv_path):
+    """列式缓存目录，与 CSV 同目录，例如 data/insurance.columnar/"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + SIDECAR_SUFFIX)
+
+
+def _source_state(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _read_meta(directory):
+    try:
+        with open(directory / META_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(meta, csv_path, schema):
+    return (
+        meta is not None
+        and meta.get('format') == FORMAT_VERSION
+        and meta.get('source') == _source_state(csv_path)
+        and meta.get('schema') == schema
+    )
+
+
+def _encode_column(series, dtype):
+    """按目标类型编码单列，返回 (数组, 列元数据)；整数转换有损时保留原类型"""
+    if dtype == 'category' or (dtype is None and series.dtype == object):
+        categorical = series.astype('category')
+        categories = categorical.cat.categories.tolist()
+        codes_dtype = np.int8 if len(categories) < 2 ** 7 else np.int16 if len(categories) < 2 ** 15 else np.int32
+        return categorical.cat.codes.to_numpy().astype(codes_dtype), {'kind': 'category', 'categories': categories}
+
+    values = series.to_numpy()
+    if dtype is not None and not series.isna().any():
+        converted = values.astype(dtype)
+        if np.issubdtype(np.dtype(dtype), np.floating) or np.array_equal(converted, values):
+            values = converted
+    return values, {'kind': 'numeric'}
+
+
+def build_columnar(csv_path, schema=None):
+    """解析 CSV 并写入列式缓存：每列一个 .npy 文件，另有 meta.json 记录类型与来源文件状态"""
+    csv_path = Path(csv_path)
+    schema = schema or {}
+    source = _source_state(csv_path)
+    df = pd.read_csv(csv_path)
+
+    target = sidecar_dir(csv_path)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=target.name + '.', dir=target.parent))
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            values, column_meta = _encode_column(df[name], schema.get(name.strip()))
+            column_meta['name'] = name
+            column_meta['file'] = f'{i}.npy'
+            np.save(tmp_dir / column_meta['file'], values)
+            columns.append(column_meta)
+
+        meta = {'format': FORMAT_VERSION, 'source': source, 'schema': schema,
+                'rows': len(df), 'columns': columns}
+        with open(tmp_dir / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        # 先写临时目录再替换，其他进程不会读到写了一半的缓存
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except OSError:
+        # 并发进程已抢先替换，或目录不可写；下次加载时再重建
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target
+
+
+def load_columnar(csv_path, schema=None, writable=False):
+    """
+    以内存映射方式加载 CSV 对应的列式缓存，缓存缺失或 CSV 已更新时自动重建。
+    writable=False 时各列只读；writable=True 时为写时复制，修改不会写回缓存文件。
+    缓存无法写入时退回直接解析 CSV。
+    """
+    csv_path = Path(csv_path)
+    schema = schema or {}
+    directory = sidecar_dir(csv_path)
+
+    meta = _read_meta(directory)
+    if not _is_fresh(meta, csv_path, schema):
+        build_columnar(csv_path, schema)
+        meta = _read_meta(directory)
+        if not _is_fresh(meta, csv_path, schema):
+            return pd.read_csv(csv_path)
+
+    mmap_mode = 'c' if writable else 'r'
+    data = {}
+    for column in meta['columns']:
+        values = np.load(directory / column['file'], mmap_mode=mmap_mode)
+        if column['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=column['categories'])
+        data[column['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+PARTITIONED_SUFFIX = '.partitioned'
+
+# 分区数据中记录原始行号的列，用于恢复 CSV 中的行序
+ROW_COLUMN = '_row'
+
+
+def partitioned_dir(csv_path):
+    """分区列式数据目录，与 CSV 同目录，例如 data/insurance.partitioned/"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + PARTITIONED_SUFFIX)
+
+
+def _partition_path(partition_by, values):
+    # 与 Hive 风格一致：region=southeast/smoker=yes，缺失值记为 __null__
+    return '/'.join(f"{column}={'__null__' if values[column] is None else values[column]}"
+                    for column in partition_by)
+
+
+def build_partitioned(csv_path, schema, partition_by):
+    """
+    按 partition_by 各列的取值把数据拆分为若干分区目录（例如 region=southeast/smoker=yes/），
+    分区内每列一个 .npy 文件，另存原始行号；分区列的取值记在 meta.json 中，不再逐行存储。
+    """
+    csv_path = Path(csv_path)
+    source = _source_state(csv_path)
+    df = load_columnar(csv_path, schema)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        dtype = df[name].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = df[name].cat.codes.to_numpy()
+            column_meta = {'kind': 'category', 'categories': dtype.categories.tolist()}
+        else:
+            values = df[name].to_numpy()
+            column_meta = {'kind': 'numeric'}
+        column_meta.update({'name': name, 'file': f'{i}.npy', 'dtype': values.dtype.str,
+                            'partition': name in partition_by})
+        columns.append((column_meta, values))
+
+    target = partitioned_dir(csv_path)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=target.name + '.', dir=target.parent))
+    try:
+        partitions = []
+        groups = df.groupby(list(partition_by), observed=True, dropna=False, sort=True).indices
+        for key, positions in groups.items():
+            key = key if isinstance(key, tuple) else (key,)
+            values = {column: None if pd.isna(value) else value for column, value in zip(partition_by, key)}
+            relative = _partition_path(partition_by, values)
+            directory = tmp_dir / relative
+            directory.mkdir(parents=True)
+            np.save(directory / 'row.npy', positions.astype(np.int64))
+            for column_meta, column_values in columns:
+                if not column_meta['partition']:
+                    np.save(directory / column_meta['file'], column_values[positions])
+            partitions.append({'values': values, 'dir': relative, 'rows': len(positions)})
+
+        meta = {'format': FORMAT_VERSION, 'source': source, 'schema': schema,
+                'partition_by': list(partition_by), 'rows': len(df),
+                'columns': [column_meta for column_meta, _ in columns], 'partitions': partitions}
+        with open(tmp_dir / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target
+
+
+def cached_row_count(csv_path, schema=None):
+    """列式缓存或分区数据 meta.json 中记录的行数（仅在与 CSV 当前状态一致时），都没有时返回 None"""
+    csv_path = Path(csv_path)
+    schema = schema or {}
+    for directory in (sidecar_dir(csv_path), partitioned_dir(csv_path)):
+        meta = _read_meta(directory)
+        if _is_fresh(meta, csv_path, schema):
+            return meta['rows']
+    return None
+
+
+def _filter_in_memory(csv_path, schema, filters):
+    """分区数据无法写入时的退路：整体加载后按条件筛选"""
+    df = load_columnar(csv_path, schema)
+    df[ROW_COLUMN] = np.arange(len(df), dtype=np.int64)
+    for column, value in filters.items():
+        df = df[df[column] == value]
+    return df
+
+
+def load_partitioned(csv_path, schema, partition_by, filters=None):
+    """
+    只读取满足 filters（{分区列: 取值}）的分区，按分区顺序拼接返回，附带原始行号列 ROW_COLUMN。
+    分区数据缺失或 CSV 已更新时自动重建。
+    """
+    csv_path = Path(csv_path)
+    schema = schema or {}
+    filters = filters or {}
+    directory = partitioned_dir(csv_path)
+
+    def fresh(meta):
+        return _is_fresh(meta, csv_path, schema) and meta.get('partition_by') == list(partition_by)
+
+    meta = _read_meta(directory)
+    if not fresh(meta):
+        build_partitioned(csv_path, schema, partition_by)
+        meta = _read_meta(directory)
+        if not fresh(meta):
+            return _filter_in_memory(csv_path, schema, filters)
+
+    # 分区裁剪：只打开取值匹配的分区目录
+    selected = [p for p in meta['partitions']
+                if all(p['values'].get(column) == value for column, value in filters.items())]
+
+    data = {}
+    for column in meta['columns']:
+        if column['partition']:
+            # 分区列由分区取值还原
+            parts = [np.full(p['rows'], -1 if p['values'][column['name']] is None
+                             else column['categories'].index(p['values'][column['name']]), dtype=column['dtype'])
+                     for p in selected]
+        else:
+            parts = [np.load(directory / p['dir'] / column['file'], mmap_mode='r') for p in selected]
+        values = np.concatenate(parts) if parts else np.zeros(0, dtype=column['dtype'])
+        if column['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=column['categories'])
+        data[column['name']] = values
+
+    rows = [np.load(directory / p['dir'] / 'row.npy', mmap_mode='r') for p in selected]
+    data[ROW_COLUMN] = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    return pd.DataFrame(data, copy=False)
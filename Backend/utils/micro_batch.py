@@ -0,0 +1,102 @@
+"""
+动态微批调度：把短时间窗口内到达的多个小请求合并为一个矩阵，只做一次推理，
+再把结果按行切分返回给各自的调用方。
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    fn 接收合并后的二维矩阵，返回与行一一对应的若干数组（元组）。
+    第一个请求到达后最多再等待 window 秒，或累计达到 max_rows 行即开始推理。
+    """
+
+    def __init__(self, fn, window=0.002, max_rows=512):
+        self.fn = fn
+        self.window = window
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        # 指标：批次数、总行数、最大批次、按 2 的幂分桶的批次行数分布
+        self._batches = 0
+        self._rows = 0
+        self._max_batch = 0
+        self._histogram = {}
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker.start()
+
+    def submit(self, matrix):
+        """提交若干行，返回 Future，结果为 fn 输出中对应这些行的切片"""
+        future = Future()
+        self._queue.put((matrix, future))
+        self._ensure_worker()
+        return future
+
+    def __call__(self, matrix):
+        return self.submit(matrix).result()
+
+    def _collect(self):
+        items = [self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items, rows
+
+    def _record(self, rows):
+        with self._lock:
+            self._batches += 1
+            self._rows += rows
+            self._max_batch = max(self._max_batch, rows)
+            bucket = 1 << (rows - 1).bit_length()
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+
+    def _run(self):
+        while True:
+            items, rows = self._collect()
+            self._record(rows)
+            try:
+                outputs = self.fn(np.concatenate([matrix for matrix, _ in items]))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for matrix, future in items:
+                end = start + len(matrix)
+                future.set_result(tuple(output[start:end] for output in outputs))
+                start = end
+
+    def metrics(self):
+        """队列深度与批次行数统计"""
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'window_ms': self.window * 1000,
+                'max_rows': self.max_rows,
+                'batches': self._batches,
+                'rows': self._rows,
+                'mean_batch_size': self._rows / self._batches if self._batches else 0,
+                'max_batch_size': self._max_batch,
+                # 键为批次行数的上界（2 的幂）
+                'batch_size_histogram': {str(k): v for k, v in sorted(self._histogram.items())},
+            }
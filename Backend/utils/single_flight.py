@@ -0,0 +1,103 @@
+"""
+请求合并与过期重验证：
+SingleFlight 让并发的相同计算只执行一次，其余调用方等待并共享结果；
+StaleWhileRevalidate 在数据集变化后先返回旧结果，同时只由一个后台线程重新计算。
+"""
+import threading
+from collections import OrderedDict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """同一 key 同时只执行一次 fn，执行期间到达的调用方等待并得到同一结果（或同一异常）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class StaleWhileRevalidate:
+    """
+    按 key 缓存 (数据集版本, 结果)：版本一致时直接返回；版本变化时返回旧结果并在后台刷新；
+    没有任何结果时由第一个请求计算，并发的相同请求共享这次计算。
+    cacheable 判断结果是否可缓存（例如错误结果不缓存）。
+    """
+
+    def __init__(self, max_entries=1024, cacheable=None):
+        self.max_entries = max_entries
+        self.cacheable = cacheable or (lambda value: True)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+
+    def put(self, key, version, value):
+        if not self.cacheable(value):
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _compute(self, key, version, fn):
+        value = self._flight.do((key, version), fn)
+        self.put(key, version, value)
+        return value
+
+    def _refresh(self, key, version, fn):
+        try:
+            self._compute(key, version, fn)
+        except Exception as e:
+            # 刷新失败时继续提供旧结果，下次请求再重试
+            print(f"后台刷新 {key} 失败: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard((key, version))
+
+    def get(self, key, version, fn):
+        with self._lock:
+            entry = self._entries.get(key)
+            # 每个 (key, 新版本) 只启动一个后台刷新
+            refresh = entry is not None and entry[0] != version and (key, version) not in self._refreshing
+            if refresh:
+                self._refreshing.add((key, version))
+        if entry is None:
+            return self._compute(key, version, fn)
+        if refresh:
+            threading.Thread(target=self._refresh, args=(key, version, fn), daemon=True).start()
+        return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -41,14 +41,20 @@ export const analysisApi = {
   // 获取患者数量统计数据
   getPatientCounts() {
     return apiClient.get('/analysis/patient-counts');
+  },
+
+  // 一次获取多个分析模块数据，sections 为模块名数组，缺省时返回全部
+  getDashboard(sections) {
+    const params = sections && sections.length ? { sections: sections.join(',') } : {};
+    return apiClient.get('/analysis/dashboard', { params });
   }
 };
 
 // 数据可视化大屏相关API
 export const dashboardApi = {
-  // 获取箱线图数据（吸烟者与收费关系）
+  // 获取箱线图数据（吸烟者与收费关系），图表在前端计算，需要原始费用列表
   getBoxplotData() {
-    return apiClient.get('/analysis/boxplot');
+    return apiClient.get('/analysis/boxplot', { params: { raw: 1 } });
   },
   
   // 获取BMI与收费散点图数据
@@ -56,9 +62,9 @@ export const dashboardApi = {
     return apiClient.get('/analysis/scatter_bmi');
   },
   
-  // 获取年龄直方图数据
+  // 获取年龄直方图数据，图表在前端分组，需要原始年龄列表
   getAgeHistData() {
-    return apiClient.get('/analysis/age_hist');
+    return apiClient.get('/analysis/age_hist', { params: { raw: 1 } });
   },
   
   // 获取地区平均收费数据
@@ -71,9 +77,9 @@ export const dashboardApi = {
     return apiClient.get('/analysis/scatter_age');
   },
   
-  // 获取相关性数据
+  // 获取相关性数据，图表在前端计算相关系数，需要原始行数据
   getCorrelationData() {
-    return apiClient.get('/analysis/correlation');
+    return apiClient.get('/analysis/correlation', { params: { raw: 1 } });
   }
 };
 